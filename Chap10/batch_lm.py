@@ -0,0 +1,91 @@
+# batch_lm.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Bounded Levenberg-Marquardt fit of many curves to one model at once.
+# Used by the batch 4PL (Chap10 report_utils.py) and Michaelis-Menten
+# (Chap9 fit_MM.py) fitters, which supply only the model and its Jacobian.
+import numpy as np
+
+# Fit each row of Ys to model(Xs, params) starting from params0.
+# model(Xs, params) returns curves of shape (N, npts) for params of shape
+# (N, k); jac(Xs, params) returns the Jacobian, shape (N, npts, k). Xs is
+# shared by all curves or has one row per curve. All curves share the
+# iteration loop; each keeps its own damping factor and stops when it
+# converges. Trial steps are clipped to bounds, and parameters on a bound
+# that are pushed outward are held.
+# Returns (params, standard errors, converged, iterations), with standard
+# errors from the covariance estimate as curve_fit computes it.
+def fit_batch(model, jac, Ys, Xs, params0, bounds, max_iter=200, ftol=1e-8, xtol=1e-8):
+    Ys = np.atleast_2d(np.asarray(Ys, dtype=float))
+    Xs = np.asarray(Xs, dtype=float)
+    ncurves, npts = Ys.shape
+    lo, hi = np.asarray(bounds[0], dtype=float), np.asarray(bounds[1], dtype=float)
+    params = np.clip(np.array(np.broadcast_to(params0, (ncurves, len(lo))), dtype=float), lo, hi)
+    k      = params.shape[1]
+    eye    = np.eye(k)
+
+    # Independent variable for a subset of curves
+    def rows(idx):
+        return Xs if Xs.ndim == 1 else Xs[idx]
+
+    # Start all curves at their guess and compute initial residuals and costs
+    resid  = model(Xs, params) - Ys
+    cost   = np.sum(resid**2, axis=1)
+    lam    = np.full(ncurves, 1e-3)                 # Per-curve damping factor
+    niter  = np.zeros(ncurves, dtype=int)
+    converged = np.zeros(ncurves, dtype=bool)
+    active = np.isfinite(cost)                      # Curves still iterating
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0: break
+
+        # Damped normal equations for all active curves together
+        J    = jac(rows(idx), params[idx])
+        JtJ  = np.matmul(J.transpose(0, 2, 1), J)
+        grad = np.einsum('nmk,nm->nk', J, resid[idx])
+
+        # Hold parameters that sit on a bound and are pushed outward
+        held = ((params[idx] <= lo) & (grad > 0)) | ((params[idx] >= hi) & (grad < 0))
+        free = ~held
+        JtJ  = JtJ*free[:, :, None]*free[:, None, :] + held[:, :, None]*eye
+        grad = grad*free
+
+        diag = np.maximum(np.einsum('nkk->nk', JtJ), 1e-12)
+        H    = JtJ + (lam[idx, None]*diag)[:, :, None]*eye
+        step = np.linalg.solve(H, -grad[..., None])[..., 0]
+
+        # Evaluate clipped trial parameters
+        trial = np.clip(params[idx] + step, lo, hi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r_trial = model(rows(idx), trial) - Ys[idx]
+        c_trial = np.sum(r_trial**2, axis=1)
+        c_trial = np.where(np.isfinite(c_trial), c_trial, np.inf)
+        better  = c_trial < cost[idx]
+
+        # Converged when the accepted step barely changes cost or parameters
+        small_df = cost[idx] - c_trial <= ftol*cost[idx]
+        small_dx = np.all(np.abs(trial - params[idx]) <= xtol*(np.abs(params[idx]) + xtol), axis=1)
+        done = better & (small_df | small_dx)
+
+        # Accept improving steps, adjust damping and retire finished curves
+        acc = idx[better]
+        params[acc], resid[acc], cost[acc] = trial[better], r_trial[better], c_trial[better]
+        lam[idx] = np.where(better, lam[idx]/10, lam[idx]*10)
+        niter[idx] += 1
+
+        # No improving step within bounds means a stationary point is reached
+        done |= (lam[idx] > 1e10) | (cost[idx] == 0)
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+    # Standard errors from the covariance estimate, as curve_fit computes it
+    J    = jac(Xs, params)
+    JtJ  = np.matmul(J.transpose(0, 2, 1), J)
+    dof  = max(npts - k, 1)
+    pcov = np.linalg.pinv(JtJ) * (cost/dof)[:, None, None]
+    perr = np.sqrt(np.abs(np.einsum('nkk->nk', pcov)))
+    return params, perr, converged, niter
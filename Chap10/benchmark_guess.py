@@ -0,0 +1,51 @@
+# benchmark_guess.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Compare optimizer work for a fixed guess, data-driven guesses and a
+# warm-start cache filled by a previous run of the same series
+import sys
+import numpy as np
+from report_utils import fit_4PL, fit_4PLs_batch, guess_4PL
+from benchmark_fits import synthetic_plate
+from fit_cache import FitCache
+
+# Total function evaluations for fitting every column of df
+def total_nfev(df, Xs, guesses, bounds):
+    return sum(fit_4PL(Xs, df[col], guesses[i], bounds)[1] for i, col in enumerate(df.columns))
+
+if __name__ == '__main__':
+    ncurves = int(sys.argv[1]) if len(sys.argv) > 1 else 384
+
+    guess  = [0, 2, -5, 1]                            # Parameter guesses
+    bounds = [[0,0,-9,0], [1,1000,0,1]]               # Parameter bounds
+    concs  = [-9, -8, -7, -6, -5, -4, -3, -2, -1, 0]  # log(concentrations)
+    today  = synthetic_plate(ncurves, concs, seed=0)
+
+    # Yesterday's run of the same series fills the cache
+    cache = FitCache()
+    for col in today.columns:
+        params, _ = fit_4PL(concs, today[col], None, bounds)
+        cache.put('assay1', col, params)
+
+    # Today's re-run measures the same compounds with fresh noise
+    rng      = np.random.default_rng(1)
+    tomorrow = today + rng.normal(0.0, 0.01, today.shape)
+    Ys       = tomorrow.to_numpy().T
+
+    fixed  = [guess]*ncurves
+    data   = guess_4PL(concs, Ys, bounds)
+    warm   = [cache.get('assay1', col) for col in tomorrow.columns]
+
+    print(f'Curves fitted: {ncurves}')
+    print('curve_fit function evaluations')
+    print(f'  fixed guess       : {total_nfev(tomorrow, concs, fixed, bounds)}')
+    print(f'  data-driven guess : {total_nfev(tomorrow, concs, data, bounds)}')
+    print(f'  warm start        : {total_nfev(tomorrow, concs, warm, bounds)}')
+
+    print('Batch fit iterations (mean per curve)')
+    print(f'  fixed guess       : {fit_4PLs_batch(Ys, concs, guess, bounds)["niter"].mean():.1f}')
+    print(f'  data-driven guess : {fit_4PLs_batch(Ys, concs, None, bounds)["niter"].mean():.1f}')
+    print(f'  warm start        : {fit_4PLs_batch(Ys, concs, warm, bounds)["niter"].mean():.1f}')
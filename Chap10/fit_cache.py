@@ -0,0 +1,53 @@
+# fit_cache.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Warm-start cache of converged fit parameters keyed on (assay, compound).
+# The least recently used entries are evicted once maxsize is exceeded.
+# When a path is given the cache is loaded from and saved to a JSON file
+# so that the next run of the same series starts from the last answer.
+import json
+from collections import OrderedDict
+from pathlib import Path
+
+class FitCache:
+    def __init__(self, maxsize=100000, path=None):
+        self.maxsize = maxsize
+        self.path    = Path(path) if path else None
+        self.entries = OrderedDict()            # Oldest entries first
+        if self.path and self.path.exists():
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Return cached parameters for (assay, compound), or None
+    def get(self, assay, compound):
+        key = (str(assay), str(compound))
+        if key not in self.entries: return None
+        self.entries.move_to_end(key)           # Mark as recently used
+        return self.entries[key]
+
+    # Store converged parameters and evict least recently used entries
+    def put(self, assay, compound, params):
+        key = (str(assay), str(compound))
+        self.entries[key] = [float(p) for p in params]
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Read entries from the JSON file, keeping their saved LRU order
+    def load(self):
+        with self.path.open('r') as f:
+            items = json.load(f)
+        self.entries = OrderedDict(((a, c), p) for a, c, p in items)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Write entries to the JSON file as [assay, compound, params] triples
+    def save(self):
+        items = [[a, c, p] for (a, c), p in self.entries.items()]
+        with self.path.open('w') as f:
+            json.dump(items, f)
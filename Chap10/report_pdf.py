@@ -87,13 +87,16 @@ if __name__ == '__main__':
     guess  = [0, 2, -5, 1]                            # Parameter guesses
     bounds = [[0,0,-9,0], [1,1000,0,1]]               # Parameter bounds
     concs  = [-9, -8, -7, -6, -5, -4, -3, -2, -1, 0]  # log(concentrations)
-    param_sets = fit_4PLs(df, concs, guess, bounds)   # Fit all data
+    param_sets, failures = fit_4PLs_parallel(df, concs, guess, bounds)
+    for col, error in failures.items():               # Report failed fits
+        print(f'Sample {col+1} fit failed: {error}')
 
     # Create a plot showing all data on eight axes.
     fig2 = plot_fits(df, concs, param_sets=param_sets)
     
     # Collect table data as list of lists
-    IC50s = [f'{pow(10, float(pset[2])):0.3E}' for pset in param_sets]
+    IC50s = [f'{pow(10, float(pset[2])):0.3E}' if pset is not None else 'Fit failed'
+             for pset in param_sets]
     lol   = [ (f'Sample {i+1}', IC50s[i]) for i in range(len(IC50s)) ]
     lol.insert(0, ["Sample ID", "IC50 [M]"])          # Add column headers
     
@@ -66,7 +66,9 @@ if __name__ == '__main__':
     guess  = [0, 2, -5, 1]                            # Parameter guesses
     bounds = [[0,0,-9,0], [1,1000,0,1]]               # Parameter bounds
     concs  = [-9, -8, -7, -6, -5, -4, -3, -2, -1, 0]  # log(concentrations)
-    params = fit_4PLs(df, concs, guess, bounds)       # Fit all data
+    params, failures = fit_4PLs_parallel(df, concs, guess, bounds)
+    for col, error in failures.items():               # Report failed fits
+        print(f'Sample {col+1} fit failed: {error}')
 
     # Create eight Figures with a single plot for data and parameter set.
     for col in range(8):
@@ -75,7 +77,8 @@ if __name__ == '__main__':
         figs.append(fig)
     
     # Collect IC50 results as list of lists
-    IC50s = [f'{pow(10, float(pset[2])):0.3E}' for pset in params]
+    IC50s = [f'{pow(10, float(pset[2])):0.3E}' if pset is not None else 'Fit failed'
+             for pset in params]
     lol   = [ (f'Sample {i+1}', IC50s[i]) for i in range(8) ]
     lol.insert(0, ["Sample ID", "IC50 [M]"])          # Add column headers
     
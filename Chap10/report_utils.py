@@ -4,27 +4,232 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
-import math
 import numpy as np
 import pandas as pd
+import os, time
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from collections import deque
 import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
+from batch_lm import fit_batch
 
 # Compute the 4-parameters logistic function at Xs given the parameters
+# Parameters may be scalars or arrays that broadcast against Xs.
 def fourPL(Xs, A, B, C, D):
-    return [ D+(A-D)/(1 + math.pow((X/C),B) ) for X in Xs ]
+    Xs = np.asarray(Xs, dtype=float)
+    return D+(A-D)/(1 + np.power(Xs/C, B))
+
+# Estimate 4PL starting parameters directly from measured data
+# Ys holds one curve, or one curve per row. A is the plateau nearest X = 0,
+# D the plateau farthest from 0, C the X where the response crosses half-way
+# and B the slope of log((A-Y)/(Y-D)) against log(X/C).
+# Returns [A, B, C, D] per curve, clipped to the interior of bounds if given.
+def guess_4PL(Xs, Ys, bounds=None):
+    Xs = np.asarray(Xs, dtype=float)
+    Ys = np.asarray(Ys, dtype=float)
+    single = Ys.ndim == 1
+    Ys = np.atleast_2d(Ys)
+    rows = np.arange(len(Ys))
+
+    # Order points from X nearest 0 outward and estimate both plateaus
+    order  = np.argsort(np.abs(Xs))
+    Xs, Ys = Xs[order], Ys[:, order]
+    A = Ys[:, :2].mean(axis=1)
+    D = Ys[:, -2:].mean(axis=1)
+
+    # Interpolate the midpoint between the first points past half-way
+    half = (A + D)/2
+    past = (Ys - half[:, None])*np.sign(D - A)[:, None] >= 0
+    k    = np.clip(np.argmax(past, axis=1), 1, len(Xs)-1)
+    y0, y1 = Ys[rows, k-1], Ys[rows, k]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.where(y1 != y0, (half - y0)/(y1 - y0), 0.5), 0, 1)
+    C = Xs[k-1] + t*(Xs[k] - Xs[k-1])
+
+    # Slope from the linearized logistic, through the origin
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z  = np.log((A[:, None] - Ys)/(Ys - D[:, None]))
+        w  = np.log(Xs/C[:, None])
+        ok = np.isfinite(z) & np.isfinite(w)
+        B  = np.sum(np.where(ok, z*w, 0), axis=1)/np.sum(np.where(ok, w*w, 0), axis=1)
+    B = np.where(np.isfinite(B) & (B > 0), B, 1.0)
+
+    guesses = np.column_stack([A, B, C, D])
+    if bounds is not None:                      # Keep strictly inside bounds
+        lo, hi = np.asarray(bounds[0], dtype=float), np.asarray(bounds[1], dtype=float)
+        eps = 1e-6*(hi - lo)
+        guesses = np.clip(guesses, lo + eps, hi - eps)
+    return guesses[0] if single else guesses
+
+# Fit one curve to a 4PL. With no guess, start from guess_4PL().
+# Returns fitted parameters and the number of function evaluations used.
+def fit_4PL(Xs, Ys, guess, bounds, max_nfev=None):
+    if guess is None: guess = guess_4PL(Xs, Ys, bounds)
+    params, _, info, _, _ = curve_fit(fourPL, Xs, Ys, p0=guess, bounds=bounds,
+                                      max_nfev=max_nfev, full_output=True)
+    return params, info['nfev']
 
 # Fit all plate data to 4PLs
-def fit_4PLs(df, Xs, guess, bounds):
+# If guess is None each curve starts from data-driven estimates. With a
+# FitCache, curves start from parameters cached for (assay, column) and
+# the converged parameters are stored back in the cache.
+def fit_4PLs(df, Xs, guess, bounds, cache=None, assay=None):
     # For each row, copy data into a List, fit and accumulate fitted params
     param_sets = []
     for col in df.columns:
+        # Start from a cached fit when one exists
+        start = cache.get(assay, col) if cache is not None else None
+        if start is None: start = guess
+
         # Fit the data to the 4PL
-        params, _ = curve_fit(fourPL, Xs, df[col], p0=guess, bounds=bounds)
+        params, _ = fit_4PL(Xs, df[col], start, bounds)
         param_sets.append( params )
+        if cache is not None: cache.put(assay, col, params)
 
     return param_sets
 
+# Fit one chunk of curves to 4PLs, recording failures instead of raising
+# Returns a list of (column, params, error) tuples; params is None on failure
+def _fit_chunk(cols, Ys, Xs, guess, bounds, max_nfev):
+    results = []
+    for col, ys in zip(cols, Ys):
+        try:
+            params, _ = fit_4PL(Xs, ys, guess, bounds, max_nfev=max_nfev)
+            results.append( (col, params, None) )
+        except (RuntimeError, ValueError, np.linalg.LinAlgError) as e:
+            results.append( (col, None, str(e)) )
+    return results
+
+# Run _fit_chunk() in a child process and send the results back on conn
+def _fit_chunk_worker(conn, *args):
+    try:
+        conn.send( (True, _fit_chunk(*args)) )
+    except Exception as e:
+        conn.send( (False, repr(e)) )
+    finally:
+        conn.close()
+
+# Fit all plate data to 4PLs, spreading chunks of columns over worker processes
+# A curve that fails to converge is recorded and does not stop the others.
+# Each chunk runs in its own process, at most max_workers at a time. A chunk
+# still running timeout seconds after it started is killed and its samples
+# are recorded as timed out, so no stuck worker outlives the call.
+# Returns (param_sets, failures): param_sets holds None for each failed
+# sample and failures maps the DataFrame column to an error message.
+def fit_4PLs_parallel(df, Xs, guess, bounds, chunk_size=64, max_workers=None,
+                      timeout=None, max_nfev=None):
+    cols    = list(df.columns)
+    Ys      = df.to_numpy(dtype=float).T        # One curve per row
+    chunks  = deque(range(i, min(i+chunk_size, len(cols))) for i in range(0, len(cols), chunk_size))
+    workers = max_workers or os.cpu_count() or 1
+
+    param_sets = [None]*len(cols)
+    failures   = {}
+    running    = {}                             # conn -> (process, chunk, deadline)
+
+    # Record the results of a finished chunk
+    def collect(chunk, ok, results):
+        if not ok:                              # Worker failed, fail whole chunk
+            for i in chunk: failures[cols[i]] = f'worker error: {results}'
+            return
+        for i, (col, params, error) in zip(chunk, results):
+            if error is None:
+                param_sets[i] = params
+            else:
+                failures[col] = error
+
+    try:
+        while chunks or running:
+            # Start chunks while workers are free
+            while chunks and len(running) < workers:
+                chunk = chunks.popleft()
+                recv, send = mp.Pipe(duplex=False)
+                proc = mp.Process(target=_fit_chunk_worker, daemon=True,
+                                  args=(send, [cols[i] for i in chunk], Ys[chunk.start:chunk.stop],
+                                        Xs, guess, bounds, max_nfev))
+                proc.start()
+                send.close()                    # Child holds the only write end
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                running[recv] = (proc, chunk, deadline)
+
+            # Wait for a result or the nearest deadline
+            deadlines = [d for _, _, d in running.values() if d is not None]
+            delay = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            for conn in wait(list(running), timeout=delay):
+                proc, chunk, _ = running.pop(conn)
+                try:
+                    ok, results = conn.recv()
+                except EOFError:                # Worker died without a result
+                    proc.join()
+                    ok, results = False, f'exit code {proc.exitcode}'
+                conn.close()
+                proc.join()
+                collect(chunk, ok, results)
+
+            # Kill chunks that have run past their deadline
+            now = time.monotonic()
+            for conn, (proc, chunk, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    proc.kill()
+                    proc.join()
+                    conn.close()
+                    del running[conn]
+                    for i in chunk: failures[cols[i]] = f'timed out after {timeout} s'
+    finally:
+        for conn, (proc, _, _) in running.items():  # Only on error
+            proc.kill()
+            proc.join()
+            conn.close()
+
+    return param_sets, failures
+
+# Record layout returned by fit_4PLs_batch(), one record per curve
+FIT_DTYPE = np.dtype([('A', 'f8'), ('B', 'f8'), ('C', 'f8'), ('D', 'f8'),
+                      ('A_se', 'f8'), ('B_se', 'f8'), ('C_se', 'f8'), ('D_se', 'f8'),
+                      ('converged', '?'), ('niter', 'i4')])
+
+# Compute the analytic 4PL Jacobian for many parameter sets at once
+# params has shape (N, 4); returns an array of shape (N, len(Xs), 4)
+def fourPL_jac(Xs, params):
+    Xs = np.asarray(Xs, dtype=float)
+    A, B, C, D = (params[:, i, None] for i in range(4))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u  = Xs/C                                   # Scaled concentration
+        p  = np.power(u, B)                         # (X/C)^B
+        q  = 1/(1 + p)                              # Logistic fraction
+        lu = np.where(u > 0, np.log(u), 0.0)        # log(X/C), 0 where p vanishes
+
+        jac = np.empty(p.shape + (4,))
+        jac[..., 0] = q                             # df/dA
+        jac[..., 1] = -(A-D)*p*lu*q*q               # df/dB
+        jac[..., 2] = (A-D)*B*p*q*q/C               # df/dC
+        jac[..., 3] = 1 - q                         # df/dD
+    return np.nan_to_num(jac, posinf=0.0, neginf=0.0)
+
+# Fit every curve of a plate to a 4PL in one batched Levenberg-Marquardt run
+# (see batch_lm.fit_batch). Ys holds one curve per row, shape
+# (ncurves, len(Xs)). guess is one parameter set, one set per curve, or
+# None to start each curve from guess_4PL() estimates.
+# Returns a FIT_DTYPE structured array.
+def fit_4PLs_batch(Ys, Xs, guess, bounds, max_iter=200, ftol=1e-8, xtol=1e-8):
+    Ys = np.atleast_2d(np.asarray(Ys, dtype=float))
+    Xs = np.asarray(Xs, dtype=float)
+    if guess is None: guess = guess_4PL(Xs, Ys, bounds)
+
+    model = lambda Xs, params: fourPL(Xs, *params.T[:, :, None])
+    params, perr, converged, niter = fit_batch(model, fourPL_jac, Ys, Xs, guess, bounds,
+                                               max_iter, ftol, xtol)
+
+    # Assemble structured results array
+    fits = np.zeros(len(Ys), dtype=FIT_DTYPE)
+    for i, name in enumerate('ABCD'):
+        fits[name] = params[:, i]
+        fits[f'{name}_se'] = perr[:, i]
+    fits['converged'] = converged
+    fits['niter'] = niter
+    return fits
+
 # Plot data in columns 1-10 in each row
 def plot_fits(df, Xs, param_sets=None):
 
@@ -47,7 +252,8 @@ def plot_fits(df, Xs, param_sets=None):
             params = param_sets[col]                # Parameter set
             ax.set_title(f'Sample {col+1}')         # Add title
             ax.scatter(Xs, Ys, marker='+')          # Scatter and line plots
-            ax.plot(plot_concs, fourPL(plot_concs, *params))
+            if params is not None:                  # Skip line for failed fit
+                ax.plot(plot_concs, fourPL(plot_concs, *params))
 
     fig.tight_layout()                              # Update and return figure
     return fig
@@ -62,7 +268,8 @@ def plot_fit(Ys, Xs, title, params):
     
     ax.set_title(title)                     # Add title
     ax.scatter(Xs, Ys, marker='+')          # Scatter and line plots
-    ax.plot(plot_concs, fourPL(plot_concs, *params))
+    if params is not None:                  # Skip line for failed fit
+        ax.plot(plot_concs, fourPL(plot_concs, *params))
     
     fig.tight_layout()                      # Update and return figure
     return fig
@@ -0,0 +1,136 @@
+# plate_store.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Binary on-disk archive of plate readings opened with numpy.memmap.
+# The file starts with a 64-byte header followed by fixed-size records:
+#     barcode (32 bytes), time (float64), data (float32, nrows x ncols)
+# Because every record has the same size, plate i is a view at a known
+# offset and nothing is parsed when it is loaded.
+import sys, time
+import numpy as np
+from utils import rowCol2Label, label2RowCol
+
+MAGIC       = b'PLATESTR'
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('nrows', '<u4'),
+                         ('ncols', '<u4'), ('nplates', '<u8')])
+BARCODE_SIZE = 32
+
+# Encode a barcode for the 32-byte record field
+def encode_barcode(barcode):
+    code = str(barcode).encode()
+    if len(code) > BARCODE_SIZE:
+        raise ValueError(f'Barcode {barcode!r} is longer than {BARCODE_SIZE} bytes')
+    return code
+
+# Record layout for plates with nrows x ncols wells
+def plate_dtype(nrows, ncols):
+    return np.dtype([('barcode', f'S{BARCODE_SIZE}'), ('time', '<f8'), ('data', '<f4', (nrows, ncols))])
+
+# Precompute well labels and a label -> (row, col) lookup for a plate format
+def well_index(nrows, ncols):
+    labels = np.array([rowCol2Label(r, c) for r in range(1, nrows+1)
+                                          for c in range(1, ncols+1)]).reshape(nrows, ncols)
+    lookup = {lbl: (r, c) for (r, c), lbl in np.ndenumerate(labels)}
+    return labels, lookup
+
+# Create an empty store for plates with nrows x ncols wells
+def create_store(name, nrows=8, ncols=12):
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'], header['version'] = MAGIC, 1
+    header['nrows'], header['ncols'] = nrows, ncols
+    with open(name, 'wb') as file:
+        file.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+
+# Append plates to a store. plates is an iterable of (barcode, data) pairs
+# where data is an nrows x ncols array. Returns the new number of plates.
+# Raises ValueError for a barcode that is too long or already stored; the
+# plate count is only updated at the end, so no plate of the batch is added.
+def append_plates(name, plates):
+    with open(name, 'r+b') as file:
+        header = np.frombuffer(file.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE).copy()
+        if header['magic'][0] != MAGIC: raise ValueError(f'{name} is not a plate store')
+        dtype = plate_dtype(int(header['nrows'][0]), int(header['ncols'][0]))
+
+        # Barcodes already in the store
+        nplates = int(header['nplates'][0])
+        stored  = np.memmap(file, dtype=dtype, mode='r', offset=HEADER_SIZE,
+                            shape=(nplates,)) if nplates else np.zeros(0, dtype=dtype)
+        seen    = set(stored['barcode'].tolist())
+        del stored
+
+        # Write records after the last plate
+        file.seek(HEADER_SIZE + nplates*dtype.itemsize)
+        for barcode, data in plates:
+            code = encode_barcode(barcode)
+            if code in seen: raise ValueError(f'Duplicate barcode {barcode!r}')
+            seen.add(code)
+            rec = np.zeros(1, dtype=dtype)
+            rec['barcode'] = code
+            rec['time']    = time.time()
+            rec['data']    = data
+            file.write(rec.tobytes())
+            header['nplates'] += 1
+
+        # Update plate count in the header
+        file.seek(0)
+        file.write(header.tobytes())
+    return int(header['nplates'][0])
+
+# Open a store read-only and return a dictionary describing it:
+# {'nrows':..., 'ncols':..., 'plates': memmap of records,
+#  'index': {barcode: plate number}, 'labels': label array, 'wells': {label: (row, col)}}
+# Raises ValueError if a barcode occurs more than once.
+def open_store(name):
+    header = np.fromfile(name, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f'{name} is not a plate store')
+    nrows, ncols = int(header['nrows'][0]), int(header['ncols'][0])
+    nplates = int(header['nplates'][0])
+
+    plates = np.memmap(name, dtype=plate_dtype(nrows, ncols), mode='r',
+                       offset=HEADER_SIZE, shape=(nplates,)) if nplates else \
+             np.zeros(0, dtype=plate_dtype(nrows, ncols))
+    index  = {bc.decode(): i for i, bc in enumerate(plates['barcode'])}
+    if len(index) != nplates:
+        raise ValueError(f'{name} has duplicate barcodes')
+    labels, wells = well_index(nrows, ncols)
+    return {'nrows': nrows, 'ncols': ncols, 'plates': plates,
+            'index': index, 'labels': labels, 'wells': wells}
+
+# Get the nrows x ncols data view for a plate number or barcode
+def get_plate(store, key):
+    i = store['index'][key] if isinstance(key, str) else key
+    return store['plates'][i]['data']
+
+# Get readings for A01-style well labels on a plate
+def get_wells(store, key, labels):
+    data = get_plate(store, key)
+    rc   = []
+    for lbl in labels:                          # Fall back to label2RowCol()
+        if lbl not in store['wells']:           # for labels like 'a1' or ' B3'
+            r, c = label2RowCol(lbl)
+            lbl  = rowCol2Label(r, c)
+        rc.append( store['wells'][lbl] )
+    rows, cols = zip(*rc) if rc else ((), ())
+    return np.asarray(data[list(rows), list(cols)])
+
+# Test
+if __name__ == '__main__':
+    name = sys.argv[1] if len(sys.argv) > 1 else 'plates.bin'
+    rng  = np.random.default_rng(0)
+
+    # Build a store of 10000 384-well plates
+    create_store(name, 16, 24)
+    append_plates(name, ((f'P{i:06d}', rng.random((16, 24))) for i in range(10000)))
+
+    # Time loading one plate by barcode and reading some wells
+    store = open_store(name)
+    start = time.perf_counter()
+    plate = np.array(get_plate(store, 'P005000'))
+    elapsed = time.perf_counter() - start
+    print(f'Loaded plate P005000 {plate.shape} in {elapsed*1e6:.1f} µs')
+    print(get_wells(store, 'P005000', ['A01', 'b2', 'P24']))
@@ -4,15 +4,92 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
+from functools import lru_cache
+import numpy as np
+
+# Rows and columns of standard plate formats, by number of wells
+PLATE_FORMATS = {6: (2, 3), 12: (3, 4), 24: (4, 6), 48: (6, 8), 96: (8, 12),
+                 384: (16, 24), 1536: (32, 48), 3456: (48, 72)}
+
+# Convert a 1-based number to letters: 1 -> A, 26 -> Z, 27 -> AA, ...
+# Used for well rows beyond Z and for Excel column letters.
+def num2letters(n):
+    lets = []                           # Collect letters
+    while n > 0:                        # Continue while more to convert
+        lets.insert(0, chr((n - 1) % 26 + 65))
+        n = (n - 1) // 26               # Drop 1's position
+    return ''.join(lets)                # Join and return
+
+# Convert letters back to a 1-based number: A -> 1, AA -> 27, ...
+def letters2num(lets):
+    n = 0
+    for ch in lets:
+        n = n*26 + ord(ch) - 64
+    return n
+
 # Convert row-column pair to an A01-style well label
 def rowCol2Label(row, col):
-    row = chr(row+64)           # Convert row to letter
+    row = num2letters(row)      # Convert row to letter(s), A..Z, AA..
     col = str(col).zfill(2)     # Convert col to string and left-pad with 0's
     return f'{row}{col}'        # Format as well label and return string
 
 # Convert an A01-style well label to a row-column pair of integers
 def label2RowCol(lbl):
     lbl = lbl.strip().upper()   # Remove spaces and uppercase
-    row = ord(lbl[0])-64        # Get char code for first char and subtract 64
-    col = int(lbl[1:])          # Convert remaining chars to an int
+    n   = len(lbl) - len(lbl.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    row = letters2num(lbl[:n])  # Convert leading letters to a row number
+    col = int(lbl[n:])          # Convert remaining chars to an int
     return row, col             # Return pair as tuple
+
+# Lookup table of row or Excel column letters; entry i holds letters for i
+# (entry 0 is empty)
+@lru_cache(maxsize=None)
+def letter_table(n):
+    return np.array([''] + [num2letters(i) for i in range(1, n+1)])
+
+# Lookup table of well labels, shape (nrows+1, ncols+1), indexed by 1-based
+# row and column. Row 0 and column 0 are unused.
+@lru_cache(maxsize=None)
+def label_table(nrows, ncols, width=2):
+    rows = letter_table(nrows)
+    cols = np.array([str(c).zfill(width) for c in range(ncols+1)])
+    return np.char.add(rows[:, None], cols[None, :])
+
+# Lookup table of labels for a plate format, shape (nrows, ncols)
+def well_labels(nwells):
+    nrows, ncols = PLATE_FORMATS[nwells]
+    return label_table(nrows, ncols)[1:, 1:]
+
+# Convert arrays of 1-based rows and columns to an array of well labels
+def rowCols2Labels(rows, cols, width=2):
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    if rows.size == 0: return np.zeros(rows.shape, dtype='<U1')
+    if rows.min() < 1 or cols.min() < 1: raise ValueError('rows and cols must be >= 1')
+    nrows, ncols = max(int(rows.max()), 48), max(int(cols.max()), 72)
+    return label_table(nrows, ncols, width)[rows, cols]
+
+# Convert an array of well labels to arrays of 1-based rows and columns.
+# Each distinct label is parsed once, then results are scattered back.
+def labels2RowCols(labels):
+    labels = np.asarray(labels)
+    uniq, inverse = np.unique(labels, return_inverse=True)
+    rc = np.array([label2RowCol(str(lbl)) for lbl in uniq], dtype=np.intp).reshape(-1, 2)
+    inverse = inverse.reshape(labels.shape)
+    return rc[inverse, 0], rc[inverse, 1]
+
+# Convert row-major 1-based sequence numbers to arrays of rows and columns
+def seqs2RowCols(seqs, ncols=12):
+    seqs = np.asarray(seqs, dtype=np.intp)
+    return (seqs - 1) // ncols + 1, (seqs - 1) % ncols + 1
+
+# Convert row and column arrays to row-major 1-based sequence numbers
+def rowCols2Seqs(rows, cols, ncols=12):
+    return (np.asarray(rows, dtype=np.intp) - 1)*ncols + np.asarray(cols, dtype=np.intp)
+
+# Convert an array of 1-based column numbers to Excel column letters
+def cols2xl(cols):
+    cols = np.asarray(cols, dtype=np.intp)
+    if cols.size == 0: return np.zeros(cols.shape, dtype='<U1')
+    if cols.min() < 1: raise ValueError('cols must be >= 1')
+    return letter_table(max(int(cols.max()), 702))[cols]
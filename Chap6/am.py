@@ -115,3 +115,117 @@ AM = {
     'Hs': 277.1343, 
     'Mt': 276.1516
 }
+
+# Monoisotopic masses: mass of the most abundant isotope of each element.
+# Elements without a stable isotope use the same isotope as AM above.
+MONO = {
+    'H' : 1.00782503207, 
+    'He': 4.00260325415, 
+    'Li': 7.016004548, 
+    'Be': 9.012182201, 
+    'B' : 11.009305406, 
+    'C' : 12.0, 
+    'N' : 14.00307400478, 
+    'O' : 15.99491461956, 
+    'F' : 18.998403224, 
+    'Ne': 19.99244017542, 
+    'Na': 22.98976966, 
+    'Mg': 23.985041699, 
+    'Al': 26.981538627, 
+    'Si': 27.97692653246, 
+    'P' : 30.973761629, 
+    'S' : 31.972070999, 
+    'Cl': 34.968852682, 
+    'Ar': 39.96238312251, 
+    'K' : 38.963706679, 
+    'Ca': 39.962590983, 
+    'Sc': 44.955911909, 
+    'Ti': 47.947946281, 
+    'V' : 50.943959507, 
+    'Cr': 51.940507472, 
+    'Mn': 54.938045141, 
+    'Fe': 55.934937475, 
+    'Co': 58.933195048, 
+    'Ni': 57.935342907,
+    'Cu': 62.929597474, 
+    'Zn': 63.929142222, 
+    'Ga': 68.925573587, 
+    'Ge': 73.921177767, 
+    'As': 74.921596478, 
+    'Se': 79.916521271, 
+    'Br': 78.918337087, 
+    'Kr': 83.911506687, 
+    'Rb': 84.911789737, 
+    'Sr': 87.905612124, 
+    'Y' : 88.905848295, 
+    'Zr': 89.904704416, 
+    'Nb': 92.906378058, 
+    'Mo': 97.905408169, 
+    'Tc': 97.9072, 
+    'Ru': 101.904349312, 
+    'Rh': 102.905504292, 
+    'Pd': 105.903485715, 
+    'Ag': 106.90509682, 
+    'Cd': 113.90335854, 
+    'In': 114.903878484, 
+    'Sn': 119.902194676, 
+    'Sb': 120.903815686, 
+    'Te': 129.906224399, 
+    'I' : 126.904472681, 
+    'Xe': 131.904153457, 
+    'Cs': 132.905451933, 
+    'Ba': 137.905247237, 
+    'La': 138.906353267, 
+    'Ce': 139.905438706, 
+    'Pr': 140.907652769, 
+    'Nd': 141.907723297, 
+    'Pm': 144.9128, 
+    'Sm': 151.919732425, 
+    'Eu': 152.921230339, 
+    'Gd': 157.924103912, 
+    'Tb': 158.925346757, 
+    'Dy': 163.929174751, 
+    'Ho': 164.93032207, 
+    'Er': 165.930293061,
+    'Tm': 168.93421325, 
+    'Yb': 173.938862089, 
+    'Lu': 174.940771819, 
+    'Hf': 179.946549953, 
+    'Ta': 180.947995763, 
+    'W' : 183.950931188, 
+    'Re': 186.955753109, 
+    'Os': 191.96148069, 
+    'Ir': 192.96292643, 
+    'Pt': 194.964791134, 
+    'Au': 196.966568662, 
+    'Hg': 201.970643011, 
+    'Tl': 204.974427541, 
+    'Pb': 207.976652071, 
+    'Bi': 208.980398734, 
+    'Po': 208.9824, 
+    'At': 209.9871, 
+    'Rn': 222.0176, 
+    'Fr': 223.0197, 
+    'Ra': 226.0254, 
+    'Ac': 227.0278, 
+    'Th': 232.038055325, 
+    'Pa': 231.03588399, 
+    'U' : 238.050788247, 
+    'Np': 237.0482, 
+    'Pu': 244.0642, 
+    'Am': 243.0614, 
+    'Cm': 247.0704, 
+    'Bk': 247.0703, 
+    'Cf': 251.0796, 
+    'Es': 252.083, 
+    'Fm': 257.0951, 
+    'Md': 258.0984, 
+    'No': 259.101, 
+    'Lr': 262.1096, 
+    'Rf': 267.1218, 
+    'Db': 268.1257, 
+    'Sg': 271.1339, 
+    'Bh': 272.1383, 
+    'Hs': 277.1343, 
+    'Mt': 276.1516
+}
@@ -0,0 +1,75 @@
+# bulk_mass.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Add formula masses to a large delimited file of formulas.
+# Rows are streamed in chunks, chunks are computed in worker processes and
+# results are written in input order with 'mass' and 'error' columns added.
+import sys, os, csv, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from formula_mass import formula_masses
+
+# Compute masses for one chunk of formulas in a worker process
+# Returns a list of (mass, error) pairs with '' for missing values
+def mass_chunk(formulas):
+    masses, errors = formula_masses(formulas)
+    errs = {i: msg.splitlines()[0] for i, _, msg in errors}
+    return [('' if i in errs else repr(float(m)), errs.get(i, '')) for i, m in enumerate(masses)]
+
+# Read rows from a csv reader in lists of up to size rows
+def read_chunks(rdr, size):
+    chunk = []
+    for row in rdr:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+# Stream infile to outfile adding masses for the formulas in column.
+# At most 2*workers chunks are in flight so memory stays bounded.
+# Returns the number of data rows processed.
+def bulk_mass(infile, outfile, column='formula', sep=',', chunk_size=50000, max_workers=None):
+    nrows = 0
+    with open(infile, 'r', newline='', encoding='utf-8') as fin, \
+         open(outfile, 'w', newline='', encoding='utf-8') as fout, \
+         ProcessPoolExecutor(max_workers=max_workers) as pool:
+        rdr = csv.reader(fin, delimiter=sep)
+        wtr = csv.writer(fout, delimiter=sep)
+
+        header = next(rdr)                          # Locate formula column
+        col    = header.index(column)
+        wtr.writerow(header + ['mass', 'error'])
+
+        # Write finished chunks in submission order
+        def write_next(pending):
+            rows, future = pending.popleft()
+            for row, result in zip(rows, future.result()):
+                wtr.writerow(row + list(result))
+            return len(rows)
+
+        pending = deque()
+        limit   = 2*(max_workers or os.cpu_count() or 1)
+        width   = len(header)
+        for rows in read_chunks(rdr, chunk_size):
+            # Pad short rows so mass and error stay under their headers
+            rows     = [row + ['']*(width - len(row)) if len(row) < width else row for row in rows]
+            formulas = [row[col] for row in rows]
+            pending.append( (rows, pool.submit(mass_chunk, formulas)) )
+            if len(pending) >= limit: nrows += write_next(pending)
+        while pending: nrows += write_next(pending)
+    return nrows
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('Usage: python bulk_mass.py infile.csv outfile.csv [formula column]')
+        sys.exit()
+    column = sys.argv[3] if len(sys.argv) > 3 else 'formula'
+
+    start   = time.perf_counter()
+    nrows   = bulk_mass(sys.argv[1], sys.argv[2], column=column)
+    elapsed = time.perf_counter() - start
+    print(f'{nrows} rows in {elapsed:.2f} s ({nrows/elapsed:,.0f} rows/s)')
@@ -0,0 +1,149 @@
+# composition.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Reduce molecular formulas to integer element-count vectors indexed by the
+# elements of AM. A library of formulas becomes one count matrix, so average
+# mass, monoisotopic mass and composition searches are matrix operations.
+import numpy as np
+from am import AM, MONO
+from formula_mass import p_token
+
+ELEMENTS  = list(AM)                                # Column order of vectors
+EL_INDEX  = {el: i for i, el in enumerate(ELEMENTS)}
+AVG_MASS  = np.array([AM[el] for el in ELEMENTS])   # Average atomic masses
+MONO_MASS = np.array([MONO[el] for el in ELEMENTS]) # Monoisotopic masses
+HALOGENS  = ('F', 'Cl', 'Br', 'I', 'At')
+
+# Count the atoms of each element in a formula. Returns a dict {element: n}.
+# Groups are parsed in one pass with the same grammar as parse_mass().
+def element_counts(formula):
+    if not formula.strip(): raise SyntaxError('Empty formula')
+    stack = [{}]                            # Counts per open group
+    last  = {}                              # Pending atom or closed group
+    pend  = False                           # True if last may take a count
+    next, form_len = 0, len(formula)
+
+    # Add counts in src into dst
+    def merge(dst, src):
+        for el, k in src.items(): dst[el] = dst.get(el, 0) + k
+
+    while next < form_len:
+        m = p_token.match(formula, next)
+        if m is None:                       # Allow only trailing whitespace
+            if formula[next:].isspace(): break
+            raise SyntaxError(f'Invalid character at {next}: {formula}')
+        atom, num, left, right = m.groups()
+        next = m.end()
+
+        if atom:                            # Commit pending counts, start atom
+            if atom not in EL_INDEX: raise KeyError(atom)
+            merge(stack[-1], last)
+            last, pend = {atom: 1}, True
+        elif num:                           # Scale pending atom or group
+            if not pend: raise SyntaxError(f'Count without atom or group: {formula}')
+            last = {el: k*int(num) for el, k in last.items()}
+        elif left:                          # Open a new group
+            merge(stack[-1], last)
+            stack.append({})
+            last, pend = {}, False
+        else:                               # Close group; it becomes pending
+            if len(stack) == 1: raise SyntaxError('Missing left delimiter')
+            group = stack.pop()
+            merge(group, last)
+            last, pend = group, True
+
+    if len(stack) > 1:
+        raise SyntaxError('Missing right delimiter')
+    merge(stack[0], last)
+    return stack[0]
+
+# Convert a formula to a composition vector indexed by ELEMENTS
+def composition(formula, dtype=np.int32):
+    vec = np.zeros(len(ELEMENTS), dtype=dtype)
+    for el, k in element_counts(formula).items():
+        vec[EL_INDEX[el]] = k
+    return vec
+
+# Build a composition matrix, one row per formula.
+# int16 keeps a 500k-formula library near 100 MB. Formulas that fail to
+# parse, or have an element count too large for dtype, get a row of zeros,
+# False in the valid mask, and an (index, formula, error message) entry in
+# the error list, matching formula_masses(). Pass valid to the mass and
+# search functions so those rows give NaN and are never selected.
+# Returns (comp, valid, errors).
+def composition_matrix(formulas, dtype=np.int16):
+    formulas = list(formulas)
+    comp   = np.zeros((len(formulas), len(ELEMENTS)), dtype=dtype)
+    valid  = np.ones(len(formulas), dtype=bool)
+    errors = []
+    kmax   = np.iinfo(dtype).max
+    for i, formula in enumerate(formulas):
+        try:
+            counts = element_counts(formula)
+            for el, k in counts.items():
+                if k > kmax: raise OverflowError(f'{k} {el} atoms exceed {np.dtype(dtype).name}')
+            for el, k in counts.items():
+                comp[i, EL_INDEX[el]] = k
+        except (SyntaxError, KeyError, TypeError, OverflowError) as e:
+            valid[i] = False
+            errors.append( (i, formula, f'{type(e).__name__}: {e}') )
+    return comp, valid, errors
+
+# Multiply counts by per-element masses using only the columns in use
+def _weighted_sum(comp, weights):
+    comp = np.atleast_2d(comp)
+    used = np.flatnonzero(comp.any(axis=0))
+    return comp[:, used] @ weights[used]
+
+# Masses for each row of a composition matrix, NaN where valid is False
+def _masses(comp, weights, valid):
+    masses = _weighted_sum(comp, weights)
+    if valid is not None: masses = np.where(valid, masses, np.nan)
+    return masses
+
+# Average molecular masses for each row of a composition matrix
+def average_masses(comp, valid=None):
+    return _masses(comp, AVG_MASS, valid)
+
+# Monoisotopic (exact) masses for each row of a composition matrix
+def exact_masses(comp, valid=None):
+    return _masses(comp, MONO_MASS, valid)
+
+# Select rows by element count ranges and excluded elements.
+# ranges maps an element to an inclusive (min, max) count; elements in
+# exclude must be absent. Rows where valid is False are never selected.
+# Returns a boolean mask over the rows of comp.
+def search(comp, ranges=None, exclude=(), valid=None):
+    comp = np.atleast_2d(comp)
+    mask = np.ones(len(comp), dtype=bool) if valid is None else np.array(valid, dtype=bool)
+    for el, (lo, hi) in (ranges or {}).items():
+        col = comp[:, EL_INDEX[el]]
+        mask &= (col >= lo) & (col <= hi)
+    if exclude:
+        cols = [EL_INDEX[el] for el in exclude]
+        mask &= ~comp[:, cols].any(axis=1)
+    return mask
+
+# Format a composition vector in Hill order (C, H, then alphabetical)
+def hill_formula(vec):
+    counts = {ELEMENTS[i]: int(vec[i]) for i in np.flatnonzero(vec)}
+    order  = ['C'] + (['H'] if 'H' in counts else []) if 'C' in counts else []
+    order += sorted(el for el in counts if el not in order)
+    return ''.join(f'{el}{counts[el] if counts[el] > 1 else ""}' for el in order)
+
+# Tests
+if __name__ == '__main__':
+    library = ['C14H18N2O5', 'C16H18N2O4S', 'C10H16N5O13P3', 'C6H2(NO2)3CH3',
+               'Al2(SO4)3', 'C6H5Cl', 'CH3COOC6H4COOH', 'C27H46O']
+    comp, valid, errors = composition_matrix(library)
+    avg   = average_masses(comp, valid)
+    exact = exact_masses(comp, valid)
+    for i, form in enumerate(library):
+        print(f'{form:16} {hill_formula(comp[i]):14} MW={avg[i]:.4f}  exact={exact[i]:.4f}')
+
+    # All compounds with 2-4 N and no halogens
+    hits = search(comp, {'N': (2, 4)}, exclude=HALOGENS, valid=valid)
+    print('2-4 N, no halogens:', [library[i] for i in np.flatnonzero(hits)])
@@ -5,17 +5,22 @@
 # License:   MIT (https://opensource.org/licenses/MIT)
 
 import re
+from functools import lru_cache
+import numpy as np
 from am import AM
 
+# Regex patterns for matching formula tokens, compiled once
+p_left  = re.compile(r'\(')                 # Literal left parenthesis
+p_right = re.compile(r'\)')                 # Literal right parenthesis
+p_num   = re.compile(r'(\d+)')              # One or more digits
+p_atom  = re.compile(r'([A-Z][a-z]?)')      # Upper and optional lowercase letter
+p_ws    = re.compile(r'\s+')                # One or more whitespace chars
+
+# All tokens in one pattern: atom | count | left | right, after whitespace
+p_token = re.compile(r'\s*(?:([A-Z][a-z]?)|(\d+)|(\()|(\)))')
+
 # Tokenize a molecular formula
 def tokenize(formula):
-    # Compile regex patterns for matching formula tokens
-    p_left  = re.compile(r'\(')             # Literal left parenthesis
-    p_right = re.compile(r'\)')             # Literal right parenthesis
-    p_num   = re.compile(r'(\d+)')          # One or more digits
-    p_atom  = re.compile(r'([A-Z][a-z]?)')  # Upper and optional lowercase letter
-    p_ws    = re.compile(r'\s+')            # One or more whitespace chars
-
     tokens   = []                           # Init token list
     next     = 0                            # Init next char index to 0
     form_len = len(formula)                 # Init number of chars in formula
@@ -23,7 +28,7 @@ def tokenize(formula):
     # Tokenize the formula.
     while next < form_len:                  # While not past end of formula
         if m := p_ws.match(formula, next):  # Discard leading whitespace
-            next += m.end()                 # Move to next character position
+            next = m.end()                  # Move to next character position
                                             # Look for atom token
         elif m := p_atom.match(formula, next):
             tokens.append( m.group() )      # Add to token list
@@ -74,11 +79,73 @@ def sum_masses(tokens):
     
     return sum( masses )                    # Sum total formula mass
     
+# Parse and sum a molecular formula in a single pass without a token list.
+# stack holds a running total per open group; last is the mass of the most
+# recent atom or closed group, still waiting for a possible count. As with
+# sum_masses(), consecutive counts multiply, so 'H2 3' is H6.
+def parse_mass(formula):
+    if not formula.strip(): raise SyntaxError('Empty formula')
+    stack = [0.0]                           # Total for outermost group
+    last  = 0.0                             # Nothing pending yet
+    pend  = False                           # True if last may take a count
+    next, form_len = 0, len(formula)
+    
+    while next < form_len:
+        m = p_token.match(formula, next)
+        if m is None:                       # Allow only trailing whitespace
+            if formula[next:].isspace(): break
+            msg = f'''Invalid character: {formula}
+            {' '*(next+20)}^'''             # Identify syntax error location
+            raise SyntaxError(msg)
+        atom, num, left, right = m.groups()
+        next = m.end()
+        
+        if atom:                            # Commit pending mass, start atom
+            stack[-1] += last
+            last, pend = AM[atom], True
+        elif num:                           # Scale pending atom or group
+            if not pend: raise SyntaxError(f"Count without atom or group: {formula}")
+            last *= int(num)
+        elif left:                          # Open a new group
+            stack[-1] += last
+            stack.append(0.0)
+            last, pend = 0.0, False
+        else:                               # Close group; it becomes pending
+            if len(stack) == 1: raise SyntaxError("Missing left delimiter")
+            last = stack.pop() + last
+            pend = True
+    
+    if len(stack) > 1:                      # Unmatched delim is SyntaxError
+        raise SyntaxError("Missing right delimiter")
+    return stack[0] + last
+
+# Remove leading and trailing whitespace so equivalent formulas share one
+# cache entry. Inner whitespace separates tokens and is kept.
+def normalize_formula(formula):
+    return formula.strip()
+
+# Memoized mass for a normalized formula
+@lru_cache(maxsize=1<<18)
+def _normalized_mass(formula):
+    return parse_mass(formula)
+
 # Compute formula mass given chemical formula
 def formula_mass( formula ):    
-    tokens = tokenize(formula)
-    total  = sum_masses(tokens)
-    return total
+    return _normalized_mass( normalize_formula(formula) )
+
+# Compute masses for an iterable of formulas.
+# Returns a NumPy array of masses, with NaN for formulas that failed,
+# and a list of (index, formula, error message) for each failure.
+def formula_masses( formulas ):
+    masses = []
+    errors = []
+    for i, formula in enumerate(formulas):
+        try:
+            masses.append( formula_mass(formula) )
+        except (SyntaxError, KeyError, TypeError, AttributeError) as e:
+            masses.append( np.nan )         # Record error and keep going
+            errors.append( (i, formula, f'{type(e).__name__}: {e}') )
+    return np.array(masses, dtype=float), errors
 
 # Tests
 if __name__ == '__main__':
@@ -0,0 +1,64 @@
+# benchmark_workbook.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Compare a full workbook load with cell-by-cell reads against read-only
+# streaming with iter_rows on a large synthetic throughput workbook
+import sys, time, tracemalloc
+import openpyxl
+import numpy as np
+from forecast import read_daily
+
+# Write a workbook with nrows daily counts on a 'Data' worksheet
+def make_workbook(name, nrows, seed=0):
+    rng = np.random.default_rng(seed)
+    wb  = openpyxl.Workbook(write_only=True)
+    ws  = wb.create_sheet('Data')
+    for n in rng.integers(0, 16, nrows).tolist():
+        ws.append([n])
+    wb.save(name)
+
+# Original approach: full load and one cell() call per row
+def read_full(name):
+    wb = openpyxl.load_workbook(name)
+    ws = wb['Data']
+    daily = []
+    row = 1
+    while (nsamples := ws.cell(row, 1).value) != None:
+        daily.append( nsamples )
+        row += 1
+    wb.close()
+    return daily
+
+# Streaming approach: read-only load and iter_rows values
+def read_stream(name):
+    wb = openpyxl.load_workbook(name, read_only=True)
+    daily = read_daily(wb['Data'])
+    wb.close()
+    return daily
+
+# Return elapsed seconds and peak traced MB for fxn(name).
+# Timing is done without tracemalloc, which slows allocation heavily.
+def measure(fxn, name):
+    start = time.perf_counter()
+    fxn(name)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fxn(name)
+    peak = tracemalloc.get_traced_memory()[1]/1e6
+    tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == '__main__':
+    nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    name  = 'benchmark_workbook.xlsx'
+    make_workbook(name, nrows)
+
+    t_full, m_full = measure(read_full, name)
+    t_strm, m_strm = measure(read_stream, name)
+    print(f'Rows read          : {nrows}')
+    print(f'load_workbook+cell : {t_full:.2f} s, peak {m_full:.1f} MB')
+    print(f'read-only iter_rows: {t_strm:.2f} s, peak {m_strm:.1f} MB')
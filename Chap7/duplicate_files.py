@@ -4,44 +4,114 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
-import hashlib
+import sys, hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+EDGE = 65536                                # Bytes hashed at each end of a file
 
 # Hash a file and return unique digest
-def hash_file(path):
+def hash_file(path, block_size=65536):
     sha256 = hashlib.sha256()               # Create a SHA256 hash object
     with path.open('rb') as file:
-        while block := file.read(65536):    # Read 64KB byte blocks      
+        while block := file.read(block_size):   # Read byte blocks
             sha256.update(block)            # Update the hash with bytes.
     return sha256.hexdigest()               # Compute and return unique digest
 
+# Hash only the first and last edge bytes of a file of the given size.
+# Files no longer than 2*edge are hashed completely.
+def hash_edges(path, size, edge=EDGE):
+    sha256 = hashlib.sha256()
+    with path.open('rb') as file:
+        if size <= 2*edge:
+            sha256.update(file.read())
+        else:
+            sha256.update(file.read(edge))  # First edge bytes
+            file.seek(-edge, 2)
+            sha256.update(file.read(edge))  # Last edge bytes
+    return sha256.hexdigest()
+
+# Compute digests for paths with fxn in a thread pool, so disk reads
+# overlap. With a HashCache, unchanged files reuse their stored digest and
+# only the rest are read; cache access stays on the calling thread.
+# edge is the edge size used by fxn for edge digests.
+def digests(paths, kind, fxn, pool, cache=None, stats=None, edge=None):
+    if cache is None: return list(pool.map(fxn, paths))
+    found  = [cache.get(p, stats[p], kind, edge) for p in paths]
+    misses = [p for p, d in zip(paths, found) if d is None]
+    new    = dict(zip(misses, pool.map(fxn, misses)))
+    for p in misses: cache.put(p, stats[p], kind, new[p], edge)
+    return [d if d is not None else new[p] for p, d in zip(paths, found)]
+
+# Group paths by their digests; only groups with more than one path are returned
+def group_by(paths, keys):
+    groups = {}
+    for path, k in zip(paths, keys):
+        groups.setdefault(k, []).append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
 # Walk the current directory, list files, and recurse into subdirectories
-# Return a list of lists containing file duplicates
-def find_duplicates(top='.'):
+# Return a list of lists containing file duplicates.
+# Files are compared in stages: files with a unique size are never read,
+# files that share a size are compared by a hash of their first and last
+# edge bytes, and only files that still match are hashed completely.
+# With a HashCache, digests of unchanged files come from the cache and
+# cache.stale lists cached paths under top that no longer exist.
+def find_duplicates(top='.', block_size=65536, edge=EDGE, max_workers=8, cache=None):
     top     = Path(top)                     # Create Path object
     abspath = top.absolute()                # Get absolute path
-    digest_dict = {}                        # Initial digest dictionary
 
-    # Walk all files and directories
+    # Stage 1: group all files by size
+    by_size = {}
+    stats   = {}
     for path, dirs, files in abspath.walk():
         for file in files:                  # Iterate over all files
             file_path = path / file         # Join path and file
-            
-            digest = hash_file(file_path)   # Get full path and digest
-            if digest in digest_dict:       # Add to dictionary of lists
-                digest_dict[digest].append(file_path)
-            else:
-                digest_dict[digest] = [file_path]
-
-    # Filter to lists with length > 1 and return
-    dups = [digest_dict[k] for k in digest_dict if len(digest_dict[k]) > 1]
+            if not file_path.is_file(): continue    # Skip links to nowhere, etc.
+            stats[file_path] = st = file_path.stat()
+            by_size.setdefault(st.st_size, []).append(file_path)
+
+    if cache is not None: cache.find_stale(abspath, stats)
+
+    dups = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for size, paths in by_size.items():
+            if len(paths) < 2: continue     # Unique size, cannot be a duplicate
+            if size == 0:                   # All empty files are identical
+                dups.append(paths)
+                continue
+
+            # Stage 2: compare first and last edge bytes
+            keys = digests(paths, 'edge', lambda p: hash_edges(p, size, edge), pool, cache, stats, edge)
+            for group in group_by(paths, keys):
+                if size <= 2*edge:          # Edge hash already covered all bytes
+                    dups.append(group)
+                    continue
+
+                # Stage 3: full hash of the remaining candidates
+                keys = digests(group, 'full', lambda p: hash_file(p, block_size), pool, cache, stats)
+                dups.extend( group_by(group, keys) )
+
+    if cache is not None: cache.commit()
     return dups
 
 if __name__ == '__main__':
-    dups = find_duplicates('.')
-    
+    from hash_cache import HashCache
+
+    # Optional hash cache database as second argument
+    top   = sys.argv[1] if len(sys.argv) > 1 else '.'
+    cache = HashCache(sys.argv[2]) if len(sys.argv) > 2 else None
+    dups  = find_duplicates(top, cache=cache)
+
     # Print identified duplicates
     for dup in dups:
         print('---')
         for file in dup:
             print(file)
+
+    # Report cache use and remove entries for deleted files
+    if cache is not None:
+        print(f'Cache: {cache.hits} hits, {cache.misses} misses, {len(cache.stale)} stale entries')
+        for path in cache.stale: print(f'stale: {path}')
+        cache.purge(cache.stale)
+        cache.close()
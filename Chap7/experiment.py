@@ -5,7 +5,8 @@
 # License:   MIT (https://opensource.org/licenses/MIT)
 
 import sys
-from bs4 import BeautifulSoup
+import xml.etree.ElementTree as ET
+import numpy as np
 
 # Makes a function that tests for measurement tags with a cutoff
 def well_with_cutoff(cutoff):
@@ -20,12 +21,58 @@ def get_well_data(well):
     value = float(well.measurement.string)                  # Measured value
     return {'compounds':cmpds, 'test':test, 'value':value}  # Return dictionary
 
+# Stream (barcode, row, column, compounds, test, value) for each well
+# with a measurement above cutoff (all wells if cutoff is None).
+# The file is parsed incrementally with iterparse. Each measurement is
+# converted once, and wells are removed from their plate after they are
+# read, so memory does not grow with the size of the file.
+def _stream_wells(source, cutoff=None):
+    barcode, plate = None, None
+    for event, el in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if el.tag == 'plate':
+                barcode, plate = el.get('barcode'), el
+            continue
+        if el.tag == 'well':
+            meas  = el.find('measurement')
+            value = float(meas.text) if meas is not None and meas.text else np.nan
+            if cutoff is None or value > cutoff:
+                cmpds = [c.get('id') for c in el.iter('compound')]
+                yield (barcode, int(el.get('row')), int(el.get('column')),
+                       cmpds, meas.get('test') if meas is not None else None, value)
+            if plate is not None: del plate[:]  # Drop processed wells
+            else: el.clear()
+        elif el.tag == 'plate':
+            el.clear()
+            plate = None
+
+# Yield well data dictionaries as get_well_data() does, from a file name or
+# file object, filtering by cutoff during the parse.
+def iter_wells(source, cutoff=None):
+    for _, _, _, cmpds, test, value in _stream_wells(source, cutoff):
+        yield {'compounds':cmpds, 'test':test, 'value':value}
+
+# Read well data as columns: a dictionary of arrays for barcode, row,
+# column, test and value, plus 'compounds' as (ids, offsets) where the
+# compounds of well i are ids[offsets[i]:offsets[i+1]].
+def read_well_columns(source, cutoff=None):
+    barcodes, rows, cols, tests, values, ids, counts = [], [], [], [], [], [], []
+    for barcode, row, col, cmpds, test, value in _stream_wells(source, cutoff):
+        barcodes.append(barcode); rows.append(row); cols.append(col)
+        tests.append(test); values.append(value)
+        ids.extend(cmpds); counts.append(len(cmpds))
+    offsets = np.zeros(len(counts)+1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return {'barcode':   np.array(barcodes, dtype=str),
+            'row':       np.array(rows, dtype=np.int32),
+            'column':    np.array(cols, dtype=np.int32),
+            'test':      np.array(tests, dtype=str),
+            'value':     np.array(values, dtype=float),
+            'compounds': (np.array(ids, dtype=str), offsets)}
+
 # Test
 if __name__ == '__main__':
-    fname = sys.argv[1]                                     # Expect file name
-    with open(fname, 'r') as file:                          # Open file
-        bs = BeautifulSoup(file, 'xml')                     # Parse as XML
-
-    wells = bs(well_with_cutoff(50))                        # Get all well elements
-    data  = [get_well_data(well) for well in wells]         # Get data from wells
+    fname  = sys.argv[1]                                    # Expect file name
+    cutoff = float(sys.argv[2]) if len(sys.argv) > 2 else 50
+    data   = list(iter_wells(fname, cutoff))                # Stream well data
     print(data)                                             # Print data
@@ -6,48 +6,115 @@
 
 # Forecast of sample processing throughput using a Monte Carlo method
 # given historical data.
-import openpyxl, random
-
-# Load an existing workbook from a file
-wb = openpyxl.load_workbook('forecast.xlsx')
-
-# Get throughput sample counts Data from worksheet.
-ws_daily = wb['Data']
-
-daily = []                              # List to collect daily throughput
-row = 1                                 # Count rows until no data remaining
-while (nsamples := ws_daily.cell(row, 1).value) != None:
-    daily.append( nsamples )
-    row += 1
-
-# Perform Monte Carlo simulation to generate forecast
-histogram = [0]*(15*4*7)                # Max is 15/day*7 days/week*4 weeks
-
-# Perform 1000000 trial simulations
-for i in range(1000000):                # Trials to run for simulation
-    forecast = [0]*(4*7)                # Forecast over a 4 week time period
-    for j in range(len(forecast)):      # Set daily throughput for four weeks
-        idx = random.randint(0, len(daily)-1)
-        forecast[j] = daily[idx]        # Randomly select throughput from data.
-    total = sum(forecast)               # Month sum for this trial
-    histogram[total] += 1               # Accumulate histogram counts
-
-# Insert a new results worksheet with default name and set column titles
-ws_results = wb.create_sheet()
-ws_results.cell(1, 1).value = 'Count'
-ws_results.cell(1, 2).value = 'Frequency'
-ws_results.cell(1, 3).value = 'Probability'
-
-# Compute normalized cumulative sum in [0.0, 1.0].
-row = 2                                 # Skip column title row
-cumulative_sum = 0                      # To compute cumulative sum
-total_count    = sum(histogram)         # Total count for cumulative sum
-for i in range(300, 49, -1):            # Accumulate from max to min
-    cumulative_sum += histogram[i]/total_count
-    ws_results.cell(row, 1).value = i   # Write results to spreadsheet
-    ws_results.cell(row, 2).value = histogram[i]
-    ws_results.cell(row, 3).value = cumulative_sum
-    row += 1
-
-wb.save('forecast.xlsx')                # Save update to file
-wb.close()                              # Close the workbook
+import sys, os
+import openpyxl
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Get throughput sample counts from the first column of a worksheet.
+# Rows are streamed with iter_rows so a read-only worksheet never
+# materializes cells; reading stops at the first empty cell.
+def read_daily(ws_daily):
+    daily = []                          # List to collect daily throughput
+    for (nsamples,) in ws_daily.iter_rows(min_col=1, max_col=1, values_only=True):
+        if nsamples is None: break      # Stop when no data remaining
+        daily.append( nsamples )
+    return np.array(daily, dtype=np.int64)
+
+# Perform a Monte Carlo simulation of total throughput over ndays.
+# Each trial resamples ndays daily counts with replacement. Trials are
+# drawn in chunks of chunk_size so memory stays bounded, and totals are
+# binned with np.bincount. The histogram is sized from the largest
+# possible total, max(daily)*ndays. Returns histogram counts by total.
+def simulate(daily, ntrials=1000000, ndays=4*7, seed=None, chunk_size=100000):
+    daily = np.asarray(daily, dtype=np.int64)
+    rng   = np.random.default_rng(seed)
+    histogram = np.zeros(int(daily.max())*ndays + 1, dtype=np.int64)
+
+    done = 0
+    while done < ntrials:
+        n = min(chunk_size, ntrials - done)
+        totals = rng.choice(daily, size=(n, ndays)).sum(axis=1)
+        histogram += np.bincount(totals, minlength=len(histogram))
+        done += n
+    return histogram
+
+# Run simulate() in parallel over worker processes.
+# Trials are split into tasks_per_worker*workers tasks, each with its own
+# SeedSequence child spawned from seed, so streams are independent. Partial
+# histograms are merged as they arrive; integer sums do not depend on the
+# arrival order, so results are identical for a given seed and worker count.
+# progress(done, ntrials) is called after each task completes.
+def simulate_parallel(daily, ntrials=1000000, ndays=4*7, seed=None, workers=None,
+                      tasks_per_worker=4, chunk_size=100000, progress=None):
+    daily   = np.asarray(daily, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    ntasks  = min(workers*tasks_per_worker, ntrials) or 1
+    sizes   = [ntrials//ntasks + (1 if i < ntrials % ntasks else 0) for i in range(ntasks)]
+    seeds   = np.random.SeedSequence(seed).spawn(ntasks)
+
+    histogram = np.zeros(int(daily.max())*ndays + 1, dtype=np.int64)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(simulate, daily, n, ndays, ss, chunk_size): n
+                   for n, ss in zip(sizes, seeds)}
+        for future in as_completed(futures):
+            histogram += future.result()        # Merge partial histogram
+            done += futures[future]
+            if progress: progress(done, ntrials)
+    return histogram
+
+# Probability that the total is at least each count, accumulated from max.
+# Returns (counts, frequencies, probabilities) from the largest observed
+# total down to the smallest.
+def cumulative_probability(histogram):
+    nonzero = np.flatnonzero(histogram)
+    counts  = np.arange(nonzero[-1], nonzero[0]-1, -1)
+    freqs   = histogram[counts]
+    probs   = np.cumsum(freqs)/histogram.sum()
+    return counts, freqs, probs
+
+# Insert a new results worksheet with default name and write results
+def write_results(wb, histogram):
+    ws_results = wb.create_sheet()
+    ws_results.append(['Count', 'Frequency', 'Probability'])
+
+    counts, freqs, probs = cumulative_probability(histogram)
+    for i, f, p in zip(counts.tolist(), freqs.tolist(), probs.tolist()):
+        ws_results.append([i, f, p])    # Write results to spreadsheet
+    return ws_results
+
+# Add a results worksheet to the workbook src and save it as dst.
+# The workbook is loaded normally, not read-only, so existing charts and
+# formatting are kept when dst overwrites src. Only the results sheet is
+# new, and its rows are appended.
+def save_results(src, dst, histogram):
+    wb = openpyxl.load_workbook(src)
+    write_results(wb, histogram)
+    wb.save(dst)
+    wb.close()
+
+# Print simulation progress on one line
+def print_progress(done, ntrials):
+    print(f'\r{done:,} of {ntrials:,} trials', end='' if done < ntrials else '\n')
+
+if __name__ == '__main__':
+    seed    = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    # Load an existing workbook from a file as read-only
+    wb = openpyxl.load_workbook('forecast.xlsx', read_only=True)
+
+    # Get throughput sample counts Data from worksheet.
+    daily = read_daily(wb['Data'])
+    wb.close()                          # Close the workbook
+
+    # Perform 1000000 trial simulations over a 4 week time period
+    if workers > 1:
+        histogram = simulate_parallel(daily, ntrials=1000000, ndays=4*7, seed=seed,
+                                      workers=workers, progress=print_progress)
+    else:
+        histogram = simulate(daily, ntrials=1000000, ndays=4*7, seed=seed)
+
+    # Save all sheets plus the new results sheet
+    save_results('forecast.xlsx', 'forecast.xlsx', histogram)
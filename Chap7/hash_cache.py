@@ -0,0 +1,82 @@
+# hash_cache.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Persistent SQLite cache of file digests used by find_duplicates().
+# Each row holds the digests computed for one path, together with the
+# size, modification time and inode seen when they were computed. A
+# digest is reused only while all three still match the file, so new or
+# changed files are hashed again and everything else is read from the db.
+# Edge digests also record the number of edge bytes hashed, and are only
+# reused for the same edge size.
+import os, sqlite3
+from pathlib import Path
+
+class HashCache:
+    def __init__(self, name='hash_cache.db'):
+        self.conn = sqlite3.connect(name)
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS hashes (
+                                 path  TEXT PRIMARY KEY,
+                                 size  INTEGER, mtime INTEGER, inode INTEGER,
+                                 edge  TEXT, full TEXT, edge_size INTEGER)''')
+        cols = [row[1] for row in self.conn.execute('PRAGMA table_info(hashes)')]
+        if 'edge_size' not in cols:         # Cache from an older version
+            self.conn.execute('ALTER TABLE hashes ADD COLUMN edge_size INTEGER')
+        self.stale = []                     # Stale paths found by the last scan
+        self.hits = self.misses = 0
+
+    # Return the cached digest of kind ('edge' or 'full') for path if the
+    # file is unchanged since it was stored, otherwise None. An edge digest
+    # must also have been computed with the same edge size.
+    def get(self, path, st, kind, edge=None):
+        row = self.conn.execute(f'SELECT size, mtime, inode, {kind}, edge_size FROM hashes WHERE path=?',
+                                (str(path),)).fetchone()
+        if (row and row[:3] == (st.st_size, st.st_mtime_ns, st.st_ino) and row[3]
+                and (kind != 'edge' or row[4] == edge)):
+            self.hits += 1
+            return row[3]
+        self.misses += 1
+        return None
+
+    # Store a digest of kind for path, with the edge size for edge digests.
+    # A changed file drops its other digest.
+    def put(self, path, st, kind, digest, edge=None):
+        if kind == 'edge':
+            other, sizes = 'full', 'edge_size=excluded.edge_size'
+        else:
+            other, sizes = 'edge', '''edge_size = CASE WHEN size=excluded.size AND mtime=excluded.mtime
+                                                    AND inode=excluded.inode THEN edge_size END'''
+        self.conn.execute(f'''INSERT INTO hashes (path, size, mtime, inode, {kind}, edge_size)
+                              VALUES (?, ?, ?, ?, ?, ?)
+                              ON CONFLICT(path) DO UPDATE SET
+                                  {other} = CASE WHEN size=excluded.size AND mtime=excluded.mtime
+                                                  AND inode=excluded.inode THEN {other} END,
+                                  {sizes},
+                                  size=excluded.size, mtime=excluded.mtime,
+                                  inode=excluded.inode, {kind}=excluded.{kind}''',
+                          (str(path), st.st_size, st.st_mtime_ns, st.st_ino, digest,
+                           edge if kind == 'edge' else None))
+
+    # Record cached paths under top that are not in present (deleted files)
+    def find_stale(self, top, present):
+        prefix = os.path.join(str(Path(top).absolute()), '')
+        upper  = prefix[:-1] + chr(ord(os.sep) + 1)     # First string past prefix
+        rows   = self.conn.execute('SELECT path FROM hashes WHERE path >= ? AND path < ?',
+                                   (prefix, upper))
+        present = {str(p) for p in present}
+        self.stale = [row[0] for row in rows if row[0] not in present]
+        return self.stale
+
+    # Remove entries for the given paths
+    def purge(self, paths):
+        self.conn.executemany('DELETE FROM hashes WHERE path=?', [(str(p),) for p in paths])
+        self.conn.commit()
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
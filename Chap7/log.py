@@ -4,8 +4,154 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
+import os, sys, time, atexit, threading
 from datetime import datetime
 
 def log(msg, name='log.txt'):
     with open(name, 'a') as file:
         file.write(f'{datetime.now():%Y-%m-%d %I:%M:%S %p}, {msg}\n')
+
+_stamp = (None, '')                         # (second, formatted time) last used
+
+# Current time formatted as in log(). Formatting dominates the cost of a
+# call, so the text is reused for calls within the same second.
+def timestamp():
+    global _stamp
+    sec = int(time.time())
+    if _stamp[0] != sec:
+        _stamp = (sec, f'{datetime.fromtimestamp(sec):%Y-%m-%d %I:%M:%S %p}')
+    return _stamp[1]
+
+# Buffered log file written by a background thread.
+# write() formats the line with the current time (see timestamp()), so the
+# message is logged as it was at the call and formatting errors are raised
+# to the caller, then appends it to a bounded in-memory list. The writer
+# thread swaps out the whole list at once, keeps the file open and writes
+# the lines in one batch when batch_size lines are waiting or interval
+# seconds have passed. When the file reaches max_bytes it is rotated to
+# name.1 ... name.backups. Up to max_queue lines are held, enough to absorb
+# long bursts; only if that fills does write() wait for the writer rather
+# than drop messages. After close() (also called at exit), write() falls
+# back to appending each line synchronously, as log() does.
+class LogWriter:
+    def __init__(self, name='log.txt', max_queue=1000000, batch_size=1000, interval=1.0,
+                 max_bytes=10*1024*1024, backups=3):
+        self.name       = name
+        self.max_queue  = max_queue
+        self.batch_size = batch_size
+        self.interval   = interval
+        self.max_bytes  = max_bytes
+        self.backups    = backups
+        self.lines      = []                # Lines waiting to be written
+        self.queued     = 0                 # Lines accepted by write()
+        self.written    = 0                 # Lines handed to the file
+        self.flushing   = False
+        self.closed     = False
+        self.cond       = threading.Condition()
+        self.thread     = threading.Thread(target=self._run, name=f'LogWriter({name})', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    # Queue a message with the current time. Holding the condition's lock
+    # ensures no message is queued after close() has stopped the writer.
+    def write(self, msg):
+        line = f'{timestamp()}, {msg}\n'
+        with self.cond:
+            while not self.closed and len(self.lines) >= self.max_queue:
+                self.cond.wait()            # Full, wait for the writer
+            if not self.closed:
+                self.lines.append(line)
+                self.queued += 1
+                if len(self.lines) == self.batch_size: self.cond.notify_all()
+                return
+        with open(self.name, 'a') as file:  # Synchronous fallback at shutdown
+            file.write(line)
+
+    # Wait until all queued messages are written
+    def flush(self):
+        with self.cond:
+            target = self.queued
+            self.flushing = True
+            self.cond.notify_all()
+            while self.written < target and self.thread.is_alive():
+                self.cond.wait()
+
+    # Write remaining messages and stop the writer thread
+    def close(self):
+        with self.cond:
+            if self.closed: return
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+
+    # Rename name -> name.1 -> name.2 ... dropping the oldest backup
+    def _rotate(self):
+        for i in range(self.backups-1, 0, -1):
+            if os.path.exists(f'{self.name}.{i}'):
+                os.replace(f'{self.name}.{i}', f'{self.name}.{i+1}')
+        if self.backups > 0: os.replace(self.name, f'{self.name}.1')
+        else: os.remove(self.name)
+
+    # Write a batch of lines to the open file, rotating first if it is full.
+    # Returns the file, reopened after rotation or an error.
+    def _write_batch(self, file, lines):
+        try:
+            if file is None: file = open(self.name, 'a')
+            if file.tell() >= self.max_bytes:
+                file.close()
+                self._rotate()
+                file = open(self.name, 'a')
+            file.write(''.join(lines))
+            file.flush()
+        except Exception as e:              # Never lose messages silently
+            print(f'LogWriter: {e}', file=sys.stderr)
+            sys.stderr.write(''.join(lines))
+            if file is not None: file.close()
+            file = None                     # Reopen for the next batch
+        return file
+
+    # Writer thread: wait for batch_size lines, the interval, a flush or
+    # close, then take all waiting lines and write them. Lines are already
+    # formatted and write errors are reported on stderr, so nothing in the
+    # loop can end the thread before close().
+    def _run(self):
+        file, done = None, False
+        while not done:
+            with self.cond:
+                deadline = time.monotonic() + self.interval
+                while not (self.closed or self.flushing or len(self.lines) >= self.batch_size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0: break
+                    self.cond.wait(remaining)
+                lines, self.lines = self.lines, []
+                self.flushing = False
+                done = self.closed          # No lines can follow once closed
+                self.cond.notify_all()      # Wake writers waiting for space
+
+            if lines: file = self._write_batch(file, lines)
+            with self.cond:
+                self.written += len(lines)
+                self.cond.notify_all()      # Wake flush()
+        if file is not None: file.close()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+# Return the shared LogWriter for a file name, creating it on first use
+def get_writer(name='log.txt', **kwargs):
+    with _writers_lock:
+        if name not in _writers:
+            _writers[name] = LogWriter(name, **kwargs)
+        return _writers[name]
+
+# Drop-in replacement for log() that does not wait on disk I/O
+def log_async(msg, name='log.txt'):
+    get_writer(name).write(msg)
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    start = time.perf_counter()
+    for i in range(n): log_async(f'Message {i}', 'log_async.txt')
+    queued = time.perf_counter() - start
+    get_writer('log_async.txt').flush()
+    print(f'{n:,} messages queued in {queued:.2f} s, written in {time.perf_counter()-start:.2f} s')
@@ -4,8 +4,15 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
+import os, sys, struct, zlib, bz2
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo, BadZipFile, ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2, ZIP_LZMA
+
+METHODS = {'stored': ZIP_STORED, 'deflated': ZIP_DEFLATED,
+           'bzip2': ZIP_BZIP2, 'lzma': ZIP_LZMA}
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')    # Zip local file header
 
 def zip_directory(archive, ext, top='.'):
     # Get all matching file path strings
@@ -18,5 +25,159 @@ def zip_directory(archive, ext, top='.'):
         for name in file_paths:
             zip.write(name)
 
+# True if zinfo describes the same size and modification time as prev.
+# Zip timestamps have 2-second resolution, so seconds are compared halved.
+def same_member(prev, zinfo):
+    return (prev.file_size == zinfo.file_size and
+            prev.date_time[:5] == zinfo.date_time[:5] and
+            prev.date_time[5]//2 == zinfo.date_time[5]//2)
+
+# Write an already compressed member to an open archive. zinfo carries the
+# compression type, CRC and sizes, so they go in the local header built by
+# ZipInfo.FileHeader() and no data descriptor follows. chunks yields the
+# compressed bytes. The member is registered for the central directory
+# that ZipFile writes on close.
+def write_raw(zip, zinfo, chunks):
+    zinfo.flag_bits &= ~0x08                # Sizes are in the header
+    zinfo.header_offset = zip.fp.tell()
+    zip.fp.write(zinfo.FileHeader())
+    for chunk in chunks:
+        zip.fp.write(chunk)
+    zip.filelist.append(zinfo)
+    zip.NameToInfo[zinfo.filename] = zinfo
+    zip.start_dir = zip.fp.tell()
+    zip._didModify = True
+
+# Yield the compressed bytes of a member from an open archive file
+def raw_chunks(fp, zinfo, block_size=1024*1024):
+    fp.seek(zinfo.header_offset)
+    header = LOCAL_HEADER.unpack(fp.read(LOCAL_HEADER.size))
+    fp.seek(header[10] + header[11], 1)     # Skip file name and extra field
+    left = zinfo.compress_size
+    while left > 0:
+        chunk = fp.read(min(block_size, left))
+        if not chunk: raise BadZipFile(f'Truncated member {zinfo.filename}')
+        left -= len(chunk)
+        yield chunk
+
+# Copy a member from the archive file fp to zout without recompressing it
+def copy_member(fp, zout, zinfo):
+    new = ZipInfo(zinfo.filename, zinfo.date_time)
+    for attr in ('compress_type', 'external_attr', 'comment', 'create_system',
+                 'flag_bits', 'CRC', 'compress_size', 'file_size'):
+        setattr(new, attr, getattr(zinfo, attr))
+    write_raw(zout, new, raw_chunks(fp, zinfo))
+
+# Read and compress one file in a worker thread. zlib and bz2 release the
+# GIL while compressing, so files compress in parallel.
+# Returns (size, CRC, compressed bytes).
+def compress_file(path, ctype, level):
+    data = path.read_bytes()
+    if ctype == ZIP_DEFLATED:
+        comp = zlib.compressobj(-1 if level is None else level, zlib.DEFLATED, -15)
+        packed = comp.compress(data) + comp.flush()
+    elif ctype == ZIP_BZIP2:
+        packed = bz2.compress(data, 9 if level is None else level)
+    else:
+        packed = data
+    return len(data), zlib.crc32(data), packed
+
+# Write files to an open archive in order, with compression.
+# Worker threads read and compress upcoming files and the writer appends
+# the compressed members in order; at most prefetch bytes of input are in
+# flight. LZMA members are only read ahead and are compressed by the
+# writer, since zipfile's LZMA framing is not public. Files larger than
+# prefetch are streamed and compressed by the writer itself.
+def write_members(zip, files, ctype, level, max_workers, prefetch):
+    parallel = ctype != ZIP_LZMA
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending  = deque()                  # (zinfo, future) in order
+        inflight = 0                        # Bytes being read ahead
+
+        # Write the oldest pending member
+        def write_next():
+            nonlocal inflight
+            zinfo, future = pending.popleft()
+            inflight -= zinfo.file_size
+            if not parallel:
+                zip.writestr(zinfo, future.result(), compress_type=ctype, compresslevel=level)
+                return
+            zinfo.file_size, zinfo.CRC, packed = future.result()
+            zinfo.compress_type = ctype
+            zinfo.compress_size = len(packed)
+            write_raw(zip, zinfo, [packed])
+
+        for path, zinfo in files:
+            if zinfo.file_size > prefetch:  # Stream large files directly
+                while pending: write_next()
+                zip.write(path, zinfo.filename, compress_type=ctype, compresslevel=level)
+            else:                           # Read and compress in a worker thread
+                while pending and inflight + zinfo.file_size > prefetch: write_next()
+                if parallel: future = pool.submit(compress_file, path, ctype, level)
+                else:        future = pool.submit(path.read_bytes)
+                pending.append( (zinfo, future) )
+                inflight += zinfo.file_size
+        while pending: write_next()
+
+# Archive matching files with compression, reading files ahead in threads.
+# Files are found with glob (rglob if recursive) and written in discovery
+# order. If archive exists, members with the same size and modification
+# time are skipped. New files are appended. If any archived file changed,
+# a fresh archive is written instead: unchanged members are copied across
+# and changed files replace their old members, so a name never appears
+# twice. The new archive replaces the old one only when complete.
+# Returns (number added or replaced, number skipped).
+def zip_directory_stream(archive, ext, top='.', recursive=False, method='deflated',
+                         level=6, max_workers=4, prefetch=64*1024*1024):
+    top     = Path(top)
+    archive = Path(archive)
+    paths   = top.rglob(f'*.{ext}') if recursive else top.glob(f'*.{ext}')
+    ctype   = METHODS[method]
+
+    # Latest member of each name in an existing archive
+    existing = {}
+    if archive.exists():
+        with ZipFile(archive) as zin:
+            existing = {zi.filename: zi for zi in zin.infolist()}
+
+    # Find new and changed files from their size and modification time
+    files, skipped = [], 0
+    for path in paths:
+        if not path.is_file(): continue
+        zinfo = ZipInfo.from_file(path, str(path))
+        prev  = existing.get(zinfo.filename)
+        if prev is not None and same_member(prev, zinfo):
+            skipped += 1                    # Already archived and unchanged
+            continue
+        files.append( (path, zinfo) )
+    names = {zinfo.filename for _, zinfo in files}
+
+    if not names & existing.keys():         # Nothing replaced, append or create
+        mode = 'a' if archive.exists() else 'w'
+        with ZipFile(archive, mode, compression=ctype, compresslevel=level) as zout:
+            write_members(zout, files, ctype, level, max_workers, prefetch)
+        return len(files), skipped
+
+    tmp = archive.with_name(archive.name + '.tmp')
+    try:
+        with open(archive, 'rb') as fin, \
+             ZipFile(tmp, 'w', compression=ctype, compresslevel=level) as zout:
+            for zinfo in existing.values():
+                if zinfo.filename not in names: copy_member(fin, zout, zinfo)
+            write_members(zout, files, ctype, level, max_workers, prefetch)
+        os.replace(tmp, archive)
+    finally:
+        if tmp.exists(): tmp.unlink()
+    return len(files), skipped
+
 if __name__ == '__main__':
-    zip_directory('archive.zip', 'csv')
+    # Usage: python make_zip.py [archive] [ext] [top] [method] [level]
+    if len(sys.argv) < 2:
+        zip_directory('archive.zip', 'csv')
+    else:
+        args = sys.argv[1:] + [None]*5
+        archive, ext, top = args[0], args[1] or 'csv', args[2] or '.'
+        method, level     = args[3] or 'deflated', int(args[4] or 6)
+        added, skipped = zip_directory_stream(archive, ext, top, recursive=True,
+                                              method=method, level=level)
+        print(f'{added} files added or replaced, {skipped} unchanged files skipped')
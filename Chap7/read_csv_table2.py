@@ -4,7 +4,17 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
-import sys, csv
+import sys, csv, re
+from functools import lru_cache
+from itertools import chain
+import numpy as np
+from stream_plates import row_index
+
+WELLS = 'wells'                             # Schema type for well lists like "A01, B01"
+p_well = re.compile(r'\s*([A-Za-z]{1,2})0*(\d{1,3})\s*')
+
+# Schema for table2.csv
+TABLE2_SCHEMA = {'Scientist': str, 'Samples': WELLS, 'Dilution': float, 'Comments': str}
 
 def read_csv_table2(name):
     with open(name, 'r', encoding='utf-8') as file:
@@ -21,10 +31,85 @@ def read_csv_table2(name):
 #             items = line.split(',')
 #             print( items )
 
+# Parse a well list such as "A01, B01, C01" into 0-based well indices,
+# row*ncols + col, for a plate of nrows x ncols wells (96-well by default).
+# Labels outside the plate raise ValueError; rows are not checked if nrows
+# is None. Picklists repeat the same lists often, so results are cached.
+@lru_cache(maxsize=65536)
+def parse_wells(text, nrows=8, ncols=12):
+    wells = []
+    for label in text.split(','):
+        if not label.strip(): continue
+        m = p_well.fullmatch(label)
+        if not m: raise ValueError(f'Invalid well label: {label.strip()!r}')
+        row, col = row_index(m.group(1)), int(m.group(2))
+        if not 1 <= col <= ncols or (nrows is not None and row >= nrows):
+            raise ValueError(f'Well {label.strip()!r} is outside a {nrows}x{ncols} plate')
+        wells.append( row*ncols + col - 1 )
+    return tuple(wells)
+
+# Convert a float field, treating an empty field as NaN
+def to_float(text):
+    return float(text) if text.strip() else np.nan
+
+# Convert the collected values of one column to arrays of its schema type.
+# A well-list column becomes (wells, offsets): the wells of row i are
+# wells[offsets[i]:offsets[i+1]].
+def convert_column(values, kind, nrows=8, ncols=12):
+    if kind == WELLS:
+        lists   = [parse_wells(v, nrows, ncols) for v in values]
+        offsets = np.zeros(len(lists)+1, dtype=np.int64)
+        np.cumsum([len(w) for w in lists], out=offsets[1:])
+        wells   = np.fromiter(chain.from_iterable(lists), dtype=np.int32, count=offsets[-1])
+        return wells, offsets
+    if kind is float: return np.array([to_float(v) for v in values], dtype=float)
+    if kind is int:   return np.array([int(v) for v in values], dtype=np.int64)
+    return np.array(values, dtype=str)
+
+# Yield a CSV table in batches of up to batch_size rows.
+# schema maps column titles to float, int, str or WELLS; columns not in
+# the schema are skipped. Each batch is a dictionary of column arrays as
+# returned by convert_column(), with wells on an nrows x ncols plate. The
+# title row is read once and only one batch of rows is held in memory.
+def read_csv_batches(name, schema, batch_size=100000, nrows=8, ncols=12):
+    with open(name, 'r', encoding='utf-8', newline='') as file:
+        rdr    = csv.reader(file)
+        titles = [t.strip() for t in next(rdr)]
+        missing = set(schema) - set(titles)
+        if missing: raise ValueError(f'Columns not found in {name}: {sorted(missing)}')
+        cols  = [(titles.index(t), t, kind) for t, kind in schema.items()]
+        batch = {t: [] for t in schema}
+
+        # Convert and yield the collected rows
+        def flush():
+            try:
+                result = {t: convert_column(batch[t], kind, nrows, ncols) for _, t, kind in cols}
+            except ValueError as e:
+                raise ValueError(f'{name} near line {rdr.line_num}: {e}') from None
+            for values in batch.values(): values.clear()
+            return result
+
+        count = 0
+        for row in rdr:
+            if not row: continue            # Skip blank lines
+            for i, t, _ in cols:
+                batch[t].append( row[i] if i < len(row) else '' )
+            count += 1
+            if count == batch_size:
+                yield flush()
+                count = 0
+        if count: yield flush()
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print('Please provide CSV file name')
         sys.exit()
+    if len(sys.argv) > 2:                   # Optional batch size streams table2 files
+        for batch in read_csv_batches(sys.argv[1], TABLE2_SCHEMA, int(sys.argv[2])):
+            wells, offsets = batch['Samples']
+            for i, name in enumerate(batch['Scientist']):
+                print(name, wells[offsets[i]:offsets[i+1]], batch['Dilution'][i])
+        sys.exit()
     tbl = read_csv_table2(sys.argv[1])
     for row in tbl:
         print(row)
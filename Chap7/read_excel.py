@@ -5,20 +5,37 @@
 # License:   MIT (https://opensource.org/licenses/MIT)
 
 import openpyxl as xl
+import numpy as np
 
-def read_picklists(name):
-    wb = xl.load_workbook(name)
-    ws = wb['picklists']
-    # ws = wb.worksheets[0]
-    # print(ws.title)
-    
-    for row in ws.rows:
-        for cell in row:
-            print(cell.value, end=' ')
-        print()
+# Read a worksheet as columns. The first row holds column titles.
+# The workbook is opened read-only and rows are streamed as values, so
+# no Cell objects are kept. Returns {title: NumPy array}; numeric columns
+# become float arrays and all others object arrays.
+def read_columns(name, sheet=None):
+    wb = xl.load_workbook(name, read_only=True, data_only=True)
+    ws = wb[sheet] if sheet else wb.worksheets[0]
+
+    rows   = ws.iter_rows(values_only=True)
+    titles = [str(t) for t in next(rows, ())]
+    values = [[] for _ in titles]           # One list per column
+    for row in rows:
+        for col, value in zip(values, row):
+            col.append(value)
+    wb.close()
 
-    # for row in ws.rows:
-    #     print(row[0].value)
+    columns = {}
+    for title, col in zip(titles, values):
+        if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in col):
+            columns[title] = np.array(col, dtype=float)
+        else:
+            columns[title] = np.array(col, dtype=object)
+    return columns
+
+# Read the picklists worksheet as columns
+def read_picklists(name):
+    return read_columns(name, 'picklists')
 
 if __name__ == '__main__':
-    read_picklists("table2.xlsx")
+    picklists = read_picklists("table2.xlsx")
+    for title, col in picklists.items():
+        print(title, col)
@@ -0,0 +1,53 @@
+# read_numeric.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Read numeric text files straight into NumPy arrays.
+# NumPy's loadtxt parses text in compiled code and stores float64 values
+# directly, so no Python float object is created per item. Large files can
+# be read in chunks of rows so that memory stays bounded.
+import sys
+from itertools import islice
+import numpy as np
+
+# Read one number per line into a 1-D array, like read_lines() in read1.py
+def read_lines_np(name, dtype=float):
+    return np.loadtxt(name, dtype=dtype, ndmin=1)
+
+# Read the column titles from the first line of a delimited file
+def read_titles(name, sep=','):
+    with open(name, 'r', encoding='utf-8') as file:
+        return [title.strip() for title in file.readline().split(sep)]
+
+# Read a table of delimited numbers below a title row, like
+# read_csv_table1(). Returns (titles, 2-D array of rows x columns).
+def read_table_np(name, sep=',', dtype=float):
+    titles = read_titles(name, sep)
+    data   = np.loadtxt(name, delimiter=sep, skiprows=1, dtype=dtype, ndmin=2)
+    return titles, data
+
+# Read a delimited table as a dictionary of typed column arrays.
+# dtypes maps a title to a NumPy dtype; other columns are float64.
+def read_columns_np(name, sep=',', dtypes=None):
+    titles, data = read_table_np(name, sep)
+    dtypes = dtypes or {}
+    return {t: data[:, i].astype(dtypes.get(t, float)) for i, t in enumerate(titles)}
+
+# Yield a delimited numeric table in chunks of up to chunk_rows rows.
+# The title row is skipped if header is True (use read_titles() to get it).
+# Only one chunk of lines and values is held in memory at a time.
+def iter_table_np(name, sep=',', header=True, chunk_rows=1000000, dtype=float):
+    with open(name, 'r', encoding='utf-8') as file:
+        if header: file.readline()          # Handle the header once
+        while lines := list(islice(file, chunk_rows)):
+            yield np.loadtxt(lines, delimiter=sep, dtype=dtype, ndmin=2)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Please provide CSV file name')
+        sys.exit()
+    titles, data = read_table_np(sys.argv[1])
+    print(titles)
+    print(data)
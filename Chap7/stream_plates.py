@@ -0,0 +1,84 @@
+# stream_plates.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Stream plates from instrument files that repeat a header of name-value
+# pairs followed by one well reading per line. Both reading styles below
+# are accepted, so the files read by extract_data() and read_plate_file()
+# can be streamed regardless of how many plates they hold.
+#     A1:       123.0           (Chap6 plate.txt style)
+#     A01, 123.0                (read_plate_file style)
+# The file is read line by line and only the current plate is held in
+# memory. Each plate is yielded as a dictionary of header values plus
+# 'Readings', a masked array indexed [row, col] where FAIL and missing
+# wells are masked.
+import re, sys
+import numpy as np
+
+p_well   = re.compile(r'\s*([A-Za-z]{1,2})0*(\d{1,3})\s*[:,]\s*(\S+)\s*$')
+p_header = re.compile(r'\s*([^:]+?)\s*:\s*(.*?)\s*$')
+
+# Convert a row letter label (A..Z, AA..AF) to a 0-based row index
+def row_index(letters):
+    idx = 0
+    for ch in letters.upper():
+        idx = idx*26 + ord(ch) - 64
+    return idx - 1
+
+# Assemble one plate from collected header and (row, col, value) triples
+def build_plate(header, rows, cols, vals, shape):
+    rows = np.array(rows, dtype=np.intp)
+    cols = np.array(cols, dtype=np.intp)
+    vals = np.array(vals, dtype=float)
+    if shape is None:                           # Infer shape from wells seen
+        shape = (rows.max()+1, cols.max()+1) if len(rows) else (0, 0)
+    data = np.ma.masked_all(shape, dtype=float)
+    data[rows, cols] = vals
+    data[rows[np.isnan(vals)], cols[np.isnan(vals)]] = np.ma.masked
+    plate = dict(header)
+    plate['Readings'] = data
+    return plate
+
+# Yield plates from a file one at a time.
+# shape fixes the (rows, cols) of every plate, e.g. (16, 24); by default
+# it is inferred from the largest row and column seen in each plate.
+def stream_plates(name, shape=None):
+    header, rows, cols, vals = {}, [], [], []
+    with open(name, 'r') as file:
+        for lineno, line in enumerate(file, 1):
+            if not line.strip(): continue       # Blank lines separate sections
+
+            if m := p_well.match(line):         # Well reading
+                row, col, value = m.groups()
+                rows.append( row_index(row) )
+                cols.append( int(col) - 1 )
+                if value.upper() == 'FAIL':     # Failed reads become masked
+                    vals.append( np.nan )
+                else:
+                    try:
+                        vals.append( float(value) )
+                    except ValueError:
+                        raise ValueError(f'{name}, line {lineno}: invalid reading {value!r}')
+
+            elif m := p_header.match(line):     # Header begins a new plate
+                if rows:
+                    yield build_plate(header, rows, cols, vals, shape)
+                    header, rows, cols, vals = {}, [], [], []
+                header[m.group(1)] = m.group(2)
+
+            else:
+                raise ValueError(f'{name}, line {lineno}: unrecognized line {line.strip()!r}')
+
+    if rows or header:                          # Last plate in the file
+        yield build_plate(header, rows, cols, vals, shape)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Please provide a plate file name')
+        sys.exit()
+    for plate in stream_plates(sys.argv[1]):
+        data = plate.pop('Readings')
+        print(plate)
+        print(data)
@@ -5,7 +5,8 @@
 # License:   MIT (https://opensource.org/licenses/MIT)
 
 from pathlib import Path
-import sys
+from concurrent.futures import ThreadPoolExecutor
+import sys, os, csv, json
 
 # Walk the current directory, list files, and recurse into subdirectories
 def walk_tree(top='.'):
@@ -29,8 +30,88 @@ def walk_tree(top='.'):
             fsize    = metadata.st_size             # Size in bytes
             print(f'{"   "*(depth+1-offset)}┠─ {file} ({fsize} bytes)')
 
+# Scan one directory tree with os.scandir and roll sizes up bottom-up.
+# Appends (path, 'file', size, 1) for each file when files is True, and
+# (path, 'dir', total size, total files) for each directory after its
+# contents. DirEntry type checks use cached directory data; directories
+# that cannot be read are skipped. Returns (total size, total files).
+def scan_dir(path, records, files=True):
+    total, nfiles = 0, 0
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return 0, 0
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    size, n = scan_dir(entry.path, records, files)
+                elif entry.is_file(follow_symlinks=False):
+                    size, n = entry.stat(follow_symlinks=False).st_size, 1
+                    if files: records.append( (entry.path, 'file', size, 1) )
+                else:
+                    continue                        # Skip links and devices
+            except OSError:
+                continue
+            total  += size
+            nfiles += n
+    records.append( (path, 'dir', total, nfiles) )
+    return total, nfiles
+
+# Build an inventory of a tree as a list of (path, type, size, files).
+# Top-level subdirectories are scanned in parallel threads, which overlaps
+# the metadata round trips of network shares.
+def scan_tree(top='.', files=True, max_workers=8):
+    top = os.path.abspath(top)
+    records, subdirs = [], []
+    total, nfiles = 0, 0
+    with os.scandir(top) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                size = entry.stat(follow_symlinks=False).st_size
+                if files: records.append( (entry.path, 'file', size, 1) )
+                total  += size
+                nfiles += 1
+
+    # Each subdirectory collects its own records, merged in listing order
+    def scan(path):
+        recs = []
+        return recs, scan_dir(path, recs, files)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for recs, (size, n) in pool.map(scan, subdirs):
+            records.extend(recs)
+            total  += size
+            nfiles += n
+    records.append( (top, 'dir', total, nfiles) )
+    return records
+
+# Write an inventory as compact JSON: column names plus a list of rows
+def write_json(records, name):
+    with open(name, 'w', encoding='utf-8') as file:
+        json.dump({'columns': ['path', 'type', 'size', 'files'], 'rows': records},
+                  file, separators=(',', ':'))
+
+# Write an inventory as CSV with a title row
+def write_csv(records, name):
+    with open(name, 'w', newline='', encoding='utf-8') as file:
+        wtr = csv.writer(file)
+        wtr.writerow(['path', 'type', 'size', 'files'])
+        wtr.writerows(records)
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Please enter a path")
         sys.exit()
-    walk_tree(sys.argv[1])
+
+    # With an output file, save an inventory instead of printing the tree
+    if len(sys.argv) > 2:
+        out = sys.argv[2]
+        records = scan_tree(sys.argv[1])
+        if out.endswith('.csv'): write_csv(records, out)
+        else:                    write_json(records, out)
+        print(f'{len(records)} entries, {records[-1][2]} bytes in {records[-1][3]} files')
+    else:
+        walk_tree(sys.argv[1])
@@ -0,0 +1,56 @@
+# benchmark_MM.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Compare a loop over curve_fit with the batched Michaelis-Menten fitter
+import sys, time
+import numpy as np
+from scipy.optimize import curve_fit
+from fit_MM import MM, guess_MM, prefit_MM, fit_MM_batch
+
+# Generate a synthetic kinetic panel with one velocity curve per row
+def synthetic_panel(ncurves, S, seed=0):
+    rng  = np.random.default_rng(seed)
+    Km   = rng.uniform(0.5, 8.0, ncurves)           # mM
+    Vmax = rng.uniform(50.0, 250.0, ncurves)        # µM/min
+    V    = MM(S, Km[:, None], Vmax[:, None])
+    V    = V*(1 + rng.normal(0.0, 0.05, V.shape))   # 5% proportional noise
+    return V, Km, Vmax
+
+if __name__ == '__main__':
+    ncurves = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    S      = np.array([0.05, 0.10, 0.25, 0.50, 1.00, 2.50, 5.00, 8.00, 20.00, 30.00])
+    bounds = [[0, 0], [50, 1000]]
+    V, Km, Vmax = synthetic_panel(ncurves, S)
+
+    # Time a loop over curve_fit starting from guess_MM()
+    t0 = time.perf_counter()
+    loop = []
+    for v in V:
+        params, pcov = curve_fit(MM, S, v, p0=guess_MM(S, v), bounds=bounds)
+        loop.append( (params, np.sqrt(np.diag(pcov))) )
+    t_loop = time.perf_counter() - t0
+    loop_Km  = np.array([p[0] for p, _ in loop])
+    loop_se  = np.array([se[0] for _, se in loop])
+
+    # Time the batched fit of the whole panel
+    t0 = time.perf_counter()
+    fits = fit_MM_batch(V, S, None, bounds)
+    t_batch = time.perf_counter() - t0
+
+    # Accuracy of the linearized pre-fits alone
+    for method in ('eadie-hofstee', 'lineweaver-burk'):
+        err = np.median(np.abs(prefit_MM(S, V, method)[:, 0]/Km - 1))
+        print(f'{method:16s}  : median |Km error| {err*100:.1f}%')
+
+    inside = np.mean((fits['Km_lo'] <= Km) & (Km <= fits['Km_hi']))
+    print(f'Curves fitted     : {ncurves}')
+    print(f'curve_fit loop    : {t_loop:.3f} s')
+    print(f'Batch fit         : {t_batch:.3f} s ({t_loop/t_batch:.1f}x faster)')
+    print(f'Converged         : {fits["converged"].sum()} of {ncurves}')
+    print(f'Max |ΔKm| vs. loop: {np.max(np.abs(loop_Km - fits["Km"])):.2e}')
+    print(f'Max |ΔKm_se|      : {np.max(np.abs(loop_se - fits["Km_se"])):.2e}')
+    print(f'95% CI coverage   : {inside*100:.1f}% of true Km')
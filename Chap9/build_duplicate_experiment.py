@@ -4,37 +4,74 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
-import random
+import sys
+import numpy as np
 import pandas as pd
 
+# Plate formats by number of wells: (rows, columns)
+PLATE_FORMATS = {6:(2,3), 12:(3,4), 24:(4,6), 48:(6,8), 96:(8,12), 384:(16,24), 1536:(32,48)}
+
+# Row letters A..Z, AA..AZ, ... for nrows rows
+def row_letters(nrows):
+    return [chr(i+65) if i < 26 else chr(i//26+64) + chr(i%26+65) for i in range(nrows)]
+
+# Well labels of a plate format in row-major order, e.g. A01 ... H12
+def well_labels(wells=96):
+    nrows, ncols = PLATE_FORMATS[wells]
+    rows = np.repeat(row_letters(nrows), ncols)
+    cols = np.char.zfill(np.tile(np.arange(1, ncols+1), nrows).astype(str), 2)
+    return np.char.add(rows, cols)
+
+# Randomized layout of replicates of every source across destination plates.
+# Each source appears replicates times; entries are shuffled across the
+# campaign and each plate is filled in its own random well order, so with
+# 48 sources, 2 replicates and 96 wells this is the original duplicate
+# layout. Returns (source row index, plate number from 1, well index).
+def replicate_layout(nsources, replicates=2, wells=96, seed=None):
+    rng     = np.random.default_rng(seed)
+    total   = nsources*replicates
+    nplates = -(-total // wells)            # Ceiling division
+    src     = rng.permutation(np.tile(np.arange(nsources), replicates))
+    slots   = rng.permuted(np.tile(np.arange(wells), (nplates, 1)), axis=1).ravel()[:total]
+    plate   = np.arange(total)//wells + 1
+    return src, plate, slots
+
+# Build an experiment DataFrame for a source map with replicate layouts.
+# Columns are src, ID, type, vol and dest, plus the destination plate
+# when the experiment needs more than one plate.
+def build_replicate_experiment(sdf, replicates=2, wells=96, vol=100, seed=None):
+    src, plate, slots = replicate_layout(len(sdf), replicates, wells, seed)
+    df = sdf.iloc[src].reset_index(drop=True)
+    df['vol']  = vol
+    df['dest'] = well_labels(wells)[slots]
+    if plate[-1] > 1: df['plate'] = plate
+    return df
+
 # Build initial experiment DataFrame with duplicate tests and save
-def build_duplicate_experiment(sfile='source_map.csv'):
+def build_duplicate_experiment(sfile='source_map.csv', wells=96, seed=None):
     # Read Source Map into DataFrame
     sdf = pd.read_csv(sfile)
 
     # Generate DataFrame with randomized plate layout for testing
-    # Duplicate source map using concat() method
-    df = pd.concat( [sdf, sdf], ignore_index=True)
-    
-    # Add transfer volumes to 'vol' column. 100 mL each.
-    df['vol'] = [100]*96
-    
-    # Generate well labels, shuffle randomly. Add to 'dest' column.
-    dests = [f'{chr(i//12+65)}{i%12+1:02d}' for i in range(96)]
-    random.shuffle(dests)
-    df['dest'] = dests
-    
-    # Return generated DataFrame
-    return df
+    return build_replicate_experiment(sdf, 2, wells, seed=seed)
+
+# Write the worklist of an experiment DataFrame in chunks of rows
+def write_worklist(df, fname='worklist.csv', chunk_size=100000):
+    cols = ['src', 'dest', 'vol'] + (['plate'] if 'plate' in df.columns else [])
+    df   = df[cols]                         # Select the columns once
+    with open(fname, 'w', newline='') as file:
+        for start in range(0, len(df), chunk_size):
+            df.iloc[start:start+chunk_size].to_csv(file, index=False, header=(start == 0))
 
 if __name__ == '__main__':
+    # Usage: python build_duplicate_experiment.py [seed]
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
     # To start analysis build the experiment DataFrame
-    df = build_duplicate_experiment(sfile='source_map.csv')
+    df = build_duplicate_experiment(sfile='source_map.csv', seed=seed)
 
     # Save entire experiment DataFrame to file for use in future
     df.to_csv('experiment.csv', index=False)
 
     # Write worklist for liquid handler
-    wl = df[['src','dest','vol']]
-    wl.to_csv('worklist.csv', index=False)
-
+    write_worklist(df, 'worklist.csv')
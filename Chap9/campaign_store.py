@@ -0,0 +1,177 @@
+# campaign_store.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Append-only store of screening results, one Parquet file per plate.
+# Each plate's QC row is appended as one line to qc.jsonl, and a small
+# fixed-size JSON index holds the plate count and running campaign
+# statistics, so adding a plate costs O(plate) work and never rereads or
+# rewrites anything for the plates already stored:
+#   - control and sample means and standard deviations of meas and NPI,
+#     merged per type with Welford's parallel update
+#   - a fixed-bin histogram of test sample NPI, from which the campaign
+#     median, quartiles and MAD are read (to within one bin width)
+# Parquet files are written with pandas and require pyarrow.
+import os, re, sys, json, time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from screening import load_campaign, add_npi, plate_qc, find_hits
+
+HIST_RANGE = (-100.0, 200.0)                # NPI histogram range, outside goes to end bins
+HIST_BINS  = 3000                           # 0.1 NPI per bin
+p_plate    = re.compile(r'[A-Za-z0-9_.-]+')
+
+# Merge two (count, mean, M2) summaries, M2 being the sum of squared deviations
+def welford_merge(a, b):
+    na, ma, m2a = a
+    nb, mb, m2b = b
+    n = na + nb
+    if n == 0: return (0, 0.0, 0.0)
+    d = mb - ma
+    return (n, ma + d*nb/n, m2a + m2b + d*d*na*nb/n)
+
+# (count, mean, M2) of col for each type in df
+def type_summaries(df, col):
+    g = df.groupby('type', observed=True)[col]
+    s = pd.DataFrame({'n': g.count(), 'mean': g.mean(), 'var': g.var(ddof=0)})
+    return {str(t): (int(r['n']), float(r['mean']), float(r['var']*r['n'])) for t, r in s.iterrows()}
+
+# Quantile q from histogram counts over edges, interpolated within a bin
+def hist_quantile(counts, edges, q):
+    cum = np.cumsum(counts)
+    k   = q*cum[-1]
+    i   = int(np.searchsorted(cum, k))
+    before = cum[i-1] if i > 0 else 0
+    return edges[i] + (edges[i+1] - edges[i])*(k - before)/counts[i]
+
+class CampaignStore:
+    def __init__(self, path='campaign'):
+        self.path = Path(path)
+        (self.path / 'plates').mkdir(parents=True, exist_ok=True)
+        self.index_file = self.path / 'index.json'
+        self.qc_file    = self.path / 'qc.jsonl'
+        if self.index_file.exists():
+            with self.index_file.open('r') as file:
+                self.index = json.load(file)
+        else:
+            self.index = {'nplates': 0, 'stats': {'meas': {}, 'NPI': {}},
+                          'hist': [0]*(HIST_BINS + 2)}      # Plus under/overflow
+
+        # QC rows of the plates counted in the index. Lines after those were
+        # left by an interrupted append and are overwritten by the next one.
+        self.plates  = {}
+        self._qc_end = 0                    # Byte offset after the last counted row
+        if self.qc_file.exists():
+            with self.qc_file.open('rb') as file:
+                for line in file:
+                    if len(self.plates) == self.index['nplates']: break
+                    row = json.loads(line)
+                    self.plates[row.pop('plate')] = row
+                    self._qc_end += len(line)
+
+    # Write the index to a temporary file and replace the old one, so a
+    # reader never sees a partial index. Replacing the index commits an append.
+    def _save_index(self):
+        tmp = self.index_file.with_suffix('.tmp')
+        with tmp.open('w') as file:
+            json.dump(self.index, file)
+        os.replace(tmp, self.index_file)
+
+    # Add one plate of merged data with NPI (see screening.add_npi).
+    # Plates are append-only; storing the same plate twice raises ValueError.
+    def append_plate(self, plate, df):
+        key = str(plate)
+        if not p_plate.fullmatch(key): raise ValueError(f'Invalid plate name: {key!r}')
+        if key in self.plates: raise ValueError(f'Plate {key} is already stored')
+
+        df = df.assign(plate=plate)
+        qcs   = plate_qc(df)
+        qc    = qcs.iloc[0]
+        nhits = len(find_hits(df, qcs))
+        fname = f'plates/{key}.parquet'
+        df.to_parquet(self.path / fname, index=False)
+
+        # Update running statistics with this plate only
+        stats = self.index['stats']
+        for col in ('meas', 'NPI'):
+            for t, summary in type_summaries(df, col).items():
+                stats[col][t] = welford_merge(stats[col].get(t, (0, 0.0, 0.0)), summary)
+        npi = df.loc[df['type'] == 'T', 'NPI'].to_numpy()
+        bins = np.clip(np.floor((npi - HIST_RANGE[0])/(HIST_RANGE[1] - HIST_RANGE[0])*HIST_BINS),
+                       -1, HIST_BINS).astype(np.int64) + 1
+        self.index['hist'] = (np.array(self.index['hist']) +
+                              np.bincount(bins, minlength=HIST_BINS + 2)).tolist()
+
+        row = {'file': fname, 'rows': len(df), 'added': time.time(),
+               'mpos': float(qc['mpos']), 'mneg': float(qc['mneg']),
+               'ntests': int(qc['ntests']), 'zprime': float(qc['zprime']),
+               'threshold': float(qc['threshold']), 'nhits': nhits}
+
+        # Append the QC row, then commit it by saving the index
+        line = (json.dumps({'plate': key, **row}) + '\n').encode()
+        with self.qc_file.open('ab') as file:
+            file.truncate(self._qc_end)     # Drop rows of an interrupted append
+            file.write(line)
+        self.index['nplates'] += 1
+        self._save_index()
+        self._qc_end += len(line)
+        self.plates[key] = row
+
+    # Merge experiment and measurement files for one plate, add NPI and store
+    def append_measurements(self, plate, efile='experiment.csv', mfile='data_screen.csv'):
+        df = add_npi( load_campaign(efile, mfile) )
+        self.append_plate(plate, df.drop(columns='plate'))
+        return df
+
+    # Per-plate QC table
+    def qc(self):
+        return pd.DataFrame.from_dict(self.plates, orient='index')
+
+    # Running campaign statistics per type: count, mean and std (ddof=1)
+    def stats(self, col='NPI'):
+        rows = {t: {'n': n, 'mean': m, 'std': np.sqrt(m2/(n-1)) if n > 1 else np.nan}
+                for t, (n, m, m2) in self.index['stats'][col].items()}
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    # Campaign Z-factor between positive controls and test samples
+    def zprime(self):
+        s = self.stats('NPI')
+        return 1.0 - 3.0*(s.loc['P', 'std'] + s.loc['T', 'std'])/abs(s.loc['P', 'mean'] - s.loc['T', 'mean'])
+
+    # Robust statistics of test sample NPI over the campaign from the histogram
+    def robust_stats(self):
+        counts = np.array(self.index['hist'], dtype=float)
+        width  = (HIST_RANGE[1] - HIST_RANGE[0])/HIST_BINS
+        edges  = np.concatenate(([HIST_RANGE[0] - width],
+                                 np.linspace(*HIST_RANGE, HIST_BINS + 1),
+                                 [HIST_RANGE[1] + width]))
+        q1, med, q3 = (hist_quantile(counts, edges, q) for q in (0.25, 0.5, 0.75))
+        centers = (edges[:-1] + edges[1:])/2   # Deviations from the median
+        dev     = np.abs(centers - med)
+        order   = np.argsort(dev)
+        mad     = dev[order][np.searchsorted(np.cumsum(counts[order]), counts.sum()/2)]
+        return {'n': int(counts.sum()), 'median': float(med), 'q1': float(q1),
+                'q3': float(q3), 'iqr': float(q3 - q1), 'mad': float(mad)}
+
+    # Read stored plates (all by default) as one DataFrame
+    def read(self, plates=None, columns=None):
+        keys = self.plates if plates is None else [str(p) for p in plates]
+        return pd.concat([pd.read_parquet(self.path / self.plates[k]['file'], columns=columns)
+                          for k in keys], ignore_index=True)
+
+    def __len__(self):
+        return len(self.plates)
+
+if __name__ == '__main__':
+    # Usage: python campaign_store.py store_dir plate [experiment.csv] [data_screen.csv]
+    if len(sys.argv) < 3:
+        print('Please provide store directory and plate name')
+        sys.exit()
+    store = CampaignStore(sys.argv[1])
+    store.append_measurements(sys.argv[2], *sys.argv[3:5])
+    print(store.qc())
+    print(store.stats())
+    print(store.robust_stats())
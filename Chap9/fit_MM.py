@@ -4,20 +4,169 @@
 # Publisher: John Wiley & Sons, Inc.
 # License:   MIT (https://opensource.org/licenses/MIT)
 
+import numpy as np
+import scipy.stats as stats
 from scipy.optimize import curve_fit
+from batch_lm import fit_batch
+from fit_cache import FitCache
 
-# Michaelis-Menten kinetics
+# Michaelis-Menten kinetics, evaluated on arrays.
+# Km and Vmax may be column vectors to evaluate many curves at once.
 def MM(Xs, Km, Vmax):
-    return [(Vmax*X)/(Km + X) for X in Xs]
+    Xs = np.asarray(Xs, dtype=float)
+    return Vmax*Xs/(Km + Xs)
 
-# Experimental data from initial velocity experiments
-S0 = [0.05, 0.10, 0.25, 0.50, 1.00,  2.50,  5.00,  8.00, 20.00, 30.00] # [mM]
-v0 = [3.0,   6.0, 17.0, 31.0, 48.0, 101.0, 121.0, 139.0, 152.0, 181.0] # µM/min
+# Structured result of a batch MM fit, one record per curve
+FIT_MM_DTYPE = np.dtype([('Km', 'f8'), ('Vmax', 'f8'), ('Km_se', 'f8'), ('Vmax_se', 'f8'),
+                         ('Km_lo', 'f8'), ('Km_hi', 'f8'), ('Vmax_lo', 'f8'), ('Vmax_hi', 'f8'),
+                         ('converged', '?'), ('niter', 'i4')])
 
-# Initial guess and estimated bounds
-guess  = [10, 100]              # Lit values KM = 2.5 mM and Vmax = 0.19 mM min−1
-bounds = [[0,0],[20,1000]]      # Parameter bounds
+# Compute the analytic MM Jacobian for many parameter sets at once
+# params has shape (N, 2); returns an array of shape (N, len(S), 2)
+def MM_jac(S, params):
+    S = np.asarray(S, dtype=float)
+    Km, Vmax = params[:, 0, None], params[:, 1, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = S/(Km + S)                           # Saturation fraction
+        jac  = np.empty(frac.shape + (2,))
+        jac[..., 0] = -Vmax*frac/(Km + S)           # dv/dKm
+        jac[..., 1] = frac                          # dv/dVmax
+    return jac
 
-# Fit and print results
-params, _ = curve_fit(MM, S0, v0, p0=guess, bounds=bounds)
-print(f'Km={params[0]:0.3f} mM, Vmax={params[1]*0.001:0.3f} mM/min' )
+# Estimate Km and Vmax for each row of V (velocities at substrate S) with
+# a linearized least squares fit. 'eadie-hofstee' regresses v on v/S
+# (v = Vmax - Km*v/S); 'lineweaver-burk' regresses 1/v on 1/S
+# (1/v = Km/Vmax*1/S + 1/Vmax). Points with S <= 0 or v <= 0 are ignored,
+# and rows without a usable line fall back to Vmax = max(v) and Km at the
+# median S. With bounds, estimates are kept strictly inside them.
+def prefit_MM(S, V, method='eadie-hofstee', bounds=None):
+    V = np.atleast_2d(np.asarray(V, dtype=float))
+    S = np.broadcast_to(np.asarray(S, dtype=float), V.shape)
+    ok = (S > 0) & (V > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if method == 'eadie-hofstee':
+            x, y = V/S, V
+        elif method == 'lineweaver-burk':
+            x, y = 1/S, 1/V
+        else:
+            raise ValueError(f'Unknown pre-fit method: {method}')
+
+        # Row-wise weighted linear regression over usable points
+        w  = ok.astype(float)
+        n  = w.sum(axis=1)
+        x, y = np.where(ok, x, 0.0), np.where(ok, y, 0.0)
+        mx, my = (w*x).sum(axis=1)/n, (w*y).sum(axis=1)/n
+        slope  = (w*(x - mx[:, None])*(y - my[:, None])).sum(axis=1) / \
+                 (w*(x - mx[:, None])**2).sum(axis=1)
+        icept  = my - slope*mx
+        if method == 'eadie-hofstee':
+            Km, Vmax = -slope, icept
+        else:
+            Vmax = 1/icept
+            Km   = slope*Vmax
+
+    # Fall back where the line gives no physical estimate
+    bad  = ~(np.isfinite(Km) & np.isfinite(Vmax) & (Km > 0) & (Vmax > 0))
+    Km   = np.where(bad, np.median(S, axis=1), Km)
+    Vmax = np.where(bad, V.max(axis=1), Vmax)
+    guess = np.column_stack([Km, Vmax])
+
+    if bounds is not None:
+        lo, hi = np.asarray(bounds[0], dtype=float), np.asarray(bounds[1], dtype=float)
+        margin = 1e-3*(hi - lo)
+        guess  = np.clip(guess, lo + margin, hi - margin)
+    return guess
+
+# Estimate starting parameters directly from velocity data.
+# Vmax is the largest velocity and Km the substrate concentration at which
+# the velocity first reaches Vmax/2, linearly interpolated.
+def guess_MM(S, v):
+    pts  = sorted(zip(S, v))                # Order by substrate concentration
+    Vmax = max(v)
+    half = Vmax/2
+    Km   = pts[-1][0]                       # Default if half-way not reached
+    for (s0, v0), (s1, v1) in zip(pts, pts[1:]):
+        if v0 < half <= v1:                 # Interpolate the crossing
+            Km = s0 + (half - v0)*(s1 - s0)/(v1 - v0)
+            break
+    return [Km, Vmax]
+
+# Fit velocity data to the MM model.
+# With no guess, start from guess_MM(). With a FitCache, start from the
+# parameters cached for (assay, compound) and store the converged result.
+# Returns fitted parameters and the number of function evaluations used.
+def fit_MM(S, v, guess, bounds, cache=None, assay=None, compound=None):
+    start = cache.get(assay, compound) if cache is not None else None
+    if start is None: start = guess if guess is not None else guess_MM(S, v)
+
+    # Keep the starting point inside the bounds
+    start = [min(max(p, lo), hi) for p, lo, hi in zip(start, *bounds)]
+
+    params, _, info, _, _ = curve_fit(MM, S, v, p0=start, bounds=bounds, full_output=True)
+    if cache is not None: cache.put(assay, compound, params)
+    return params, info['nfev']
+
+# Fit many MM curves at once with a batched Levenberg-Marquardt iteration
+# (see batch_lm.fit_batch). V has one curve of velocities per row; S is
+# shared by all rows or has the same shape as V. With no guess, start from
+# prefit_MM(). With a FitCache and one compound name per row, cached
+# parameters replace the pre-fit for those rows and converged results are
+# stored. Confidence intervals at level 1-alpha use the Student t
+# distribution with len(S)-2 degrees of freedom.
+# Returns a FIT_MM_DTYPE structured array.
+def fit_MM_batch(V, S, guess, bounds, alpha=0.05, cache=None, assay=None, compounds=None,
+                 max_iter=200, ftol=1e-10, xtol=1e-10):
+    V = np.atleast_2d(np.asarray(V, dtype=float))
+    S = np.asarray(S, dtype=float)
+    ncurves, npts = V.shape
+    if guess is None: guess = prefit_MM(S, V, bounds=bounds)
+    start = np.array(np.broadcast_to(np.asarray(guess, dtype=float), (ncurves, 2)))
+
+    # Warm start from cached parameters
+    if cache is not None:
+        for i, compound in enumerate(compounds):
+            cached = cache.get(assay, compound)
+            if cached is not None: start[i] = cached
+
+    model = lambda S, params: MM(S, params[:, 0, None], params[:, 1, None])
+    params, perr, converged, niter = fit_batch(model, MM_jac, V, S, start, bounds,
+                                               max_iter, ftol, xtol)
+    tval = stats.t.ppf(1 - alpha/2, max(npts - 2, 1))
+
+    # Assemble structured results array
+    fits = np.zeros(ncurves, dtype=FIT_MM_DTYPE)
+    for i, name in enumerate(['Km', 'Vmax']):
+        fits[name] = params[:, i]
+        fits[f'{name}_se'] = perr[:, i]
+        fits[f'{name}_lo'] = params[:, i] - tval*perr[:, i]
+        fits[f'{name}_hi'] = params[:, i] + tval*perr[:, i]
+    fits['converged'] = converged
+    fits['niter'] = niter
+
+    if cache is not None:
+        for i in np.flatnonzero(converged): cache.put(assay, compounds[i], params[i])
+    return fits
+
+if __name__ == '__main__':
+    # Experimental data from initial velocity experiments
+    S0 = [0.05, 0.10, 0.25, 0.50, 1.00,  2.50,  5.00,  8.00, 20.00, 30.00] # [mM]
+    v0 = [3.0,   6.0, 17.0, 31.0, 48.0, 101.0, 121.0, 139.0, 152.0, 181.0] # µM/min
+
+    # Initial guess and estimated bounds
+    guess  = [10, 100]              # Lit values KM = 2.5 mM and Vmax = 0.19 mM min−1
+    bounds = [[0,0],[20,1000]]      # Parameter bounds
+
+    # Fit and print results
+    params, nfev = fit_MM(S0, v0, guess, bounds)
+    print(f'Km={params[0]:0.3f} mM, Vmax={params[1]*0.001:0.3f} mM/min' )
+
+    # Compare optimizer work for fixed, data-driven and warm-started fits
+    cache = FitCache()
+    _, nfev_data = fit_MM(S0, v0, None, bounds, cache=cache, assay='MM', compound='E1')
+    _, nfev_warm = fit_MM(S0, v0, None, bounds, cache=cache, assay='MM', compound='E1')
+    print(f'Function evaluations: fixed guess={nfev}, data-driven={nfev_data}, warm start={nfev_warm}')
+
+    # Batch fit with 95% confidence intervals
+    fit = fit_MM_batch([v0], S0, None, bounds)[0]
+    print(f'Batch: Km={fit["Km"]:0.3f} [{fit["Km_lo"]:0.3f}, {fit["Km_hi"]:0.3f}] mM, '
+          f'Vmax={fit["Vmax"]:0.1f} [{fit["Vmax_lo"]:0.1f}, {fit["Vmax_hi"]:0.1f}] µM/min')
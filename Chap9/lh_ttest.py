@@ -38,7 +38,7 @@ inacc2  = (mean2-evol)/evol*100
 # 5. Check equal variances
 ratio   = var1/var2
 eq_var  = False
-if 0.25 < ratio < 4.0: eq_var = False
+if 0.25 < ratio < 4.0: eq_var = True
 
 # 6. Perform t-test
 rslt    = stats.ttest_ind(a=vol1, b=vol2, equal_var=eq_var)
@@ -0,0 +1,125 @@
+# pairwise_ttest.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Compare every pair of groups in one pass, e.g. all syringe pairs at each
+# solvent and volume of a liquid handler QC run (see lh_ttest.py).
+# Data is grouped once into summary statistics, and variance ratios and
+# Student or Welch t-tests for all pairs are computed from the summaries as
+# array operations. As in lh_ttest.py and ttest.py, equal variances are
+# assumed when 0.25 < var1/var2 < 4. p-values are adjusted for multiple
+# comparisons over the whole table.
+import sys
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+# Per-group count, mean, variance, CV (%) and inaccuracy (%) of value.
+# Inaccuracy is computed against the expected column when given.
+def group_stats(df, value='Measured', group='Syringe', by=('Solvent', 'ExpectedVolume(uL)'),
+                expected='ExpectedVolume(uL)'):
+    keys = list(by) + [group]
+    g    = df.groupby(keys, sort=True)[value]
+    gs   = pd.DataFrame({'n': g.count(), 'mean': g.mean(), 'var': g.var()})
+    gs['cv'] = np.sqrt(gs['var'])/gs['mean']*100
+    if expected is not None:
+        evol = df.groupby(keys, sort=True)[expected].first()
+        gs['inacc'] = (gs['mean'] - evol)/evol*100
+    return gs.reset_index()
+
+# Adjust p-values for multiple comparisons: 'holm', 'bonferroni' or
+# 'fdr_bh' (Benjamini-Hochberg)
+def adjust_pvalues(p, method='holm'):
+    p = np.asarray(p, dtype=float)
+    m = len(p)
+    if m == 0: return p
+    if method == 'bonferroni':
+        return np.minimum(p*m, 1.0)
+    order = np.argsort(p)
+    ranked = p[order]
+    if method == 'holm':
+        adj = np.maximum.accumulate(ranked*(m - np.arange(m)))
+    elif method == 'fdr_bh':
+        adj = np.minimum.accumulate((ranked*m/np.arange(1, m+1))[::-1])[::-1]
+    else:
+        raise ValueError(f'Unknown correction method: {method}')
+    out = np.empty(m)
+    out[order] = np.minimum(adj, 1.0)
+    return out
+
+# Index pairs (i, j), i < j, of rows of gs that share the same by values.
+# With control, only pairs that include the control group are kept.
+def group_pairs(gs, group, by, control=None):
+    strata = gs.groupby(list(by), sort=False).indices if by else {None: np.arange(len(gs))}
+    firsts, seconds = [], []
+    for rows in strata.values():
+        i, j = np.triu_indices(len(rows), k=1)
+        firsts.append(rows[i]); seconds.append(rows[j])
+    i = np.concatenate(firsts) if firsts else np.array([], dtype=int)
+    j = np.concatenate(seconds) if seconds else np.array([], dtype=int)
+    if control is not None:
+        labels = gs[group].to_numpy()
+        keep   = (labels[i] == control) | (labels[j] == control)
+        i, j   = i[keep], j[keep]
+    return i, j
+
+# Compare all pairs of groups within each combination of by columns.
+# Returns one row per pair with both groups' statistics, variance ratio,
+# equal-variance decision, t statistic, degrees of freedom, p-value,
+# adjusted p-value and significance at alpha.
+def pairwise_ttests(df, value='Measured', group='Syringe', by=('Solvent', 'ExpectedVolume(uL)'),
+                    expected='ExpectedVolume(uL)', control=None, alpha=0.05, method='holm'):
+    by = list(by)
+    gs = group_stats(df, value, group, by, expected)
+    i, j = group_pairs(gs, group, by, control)
+    a, b = gs.iloc[i].reset_index(drop=True), gs.iloc[j].reset_index(drop=True)
+
+    n1, n2 = a['n'].to_numpy(float), b['n'].to_numpy(float)
+    m1, m2 = a['mean'].to_numpy(), b['mean'].to_numpy()
+    v1, v2 = a['var'].to_numpy(), b['var'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio  = v1/v2
+        eq_var = (ratio > 0.25) & (ratio < 4.0)
+
+        # Student: pooled variance; Welch: separate variances
+        sp2     = ((n1-1)*v1 + (n2-1)*v2)/(n1 + n2 - 2)
+        se_st   = np.sqrt(sp2*(1/n1 + 1/n2))
+        se_we   = np.sqrt(v1/n1 + v2/n2)
+        dof_we  = (v1/n1 + v2/n2)**2/((v1/n1)**2/(n1-1) + (v2/n2)**2/(n2-1))
+        se      = np.where(eq_var, se_st, se_we)
+        dof     = np.where(eq_var, n1 + n2 - 2, dof_we)
+        t       = (m1 - m2)/se
+    p = 2*stats.t.sf(np.abs(t), dof)
+
+    result = a[by].copy() if by else pd.DataFrame(index=a.index)
+    for col in ['n', 'mean', 'var', 'cv'] + (['inacc'] if expected is not None else []):
+        result[f'{col}1'] = a[col]
+        result[f'{col}2'] = b[col]
+    result.insert(len(by), f'{group}1', a[group])
+    result.insert(len(by)+1, f'{group}2', b[group])
+    result['ratio']  = ratio
+    result['eq_var'] = eq_var
+    result['t']      = t
+    result['dof']    = dof
+    result['p']      = p
+    result['p_adj']  = adjust_pvalues(p, method)
+    result['significant'] = result['p_adj'] < alpha
+    return result
+
+if __name__ == '__main__':
+    # Usage: python pairwise_ttest.py [lhdata_ttest.csv]
+    fname = sys.argv[1] if len(sys.argv) > 1 else 'lhdata_ttest.csv'
+    pd.set_option('display.width', 200)
+    tbl = pairwise_ttests(pd.read_csv(fname))
+    print(tbl[['Solvent', 'ExpectedVolume(uL)', 'Syringe1', 'Syringe2', 'cv1', 'inacc1',
+               'ratio', 'eq_var', 'p', 'p_adj', 'significant']])
+
+    # Samples against negative control as in ttest.py, using NPI
+    df   = pd.read_csv('data_ttest.csv')
+    mpos, mneg = df['pos'].mean(), df['neg'].mean()
+    npi  = 100.0 * (1.0 - (mpos - df[['neg', 'samp1', 'samp2']])/(mpos - mneg))
+    long = npi.melt(var_name='column', value_name='NPI')
+    print(pairwise_ttests(long, 'NPI', 'column', by=(), expected=None, control='neg')
+          [['column1', 'column2', 'ratio', 'eq_var', 'p', 'p_adj']])
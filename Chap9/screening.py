@@ -0,0 +1,98 @@
+# screening.py
+# Streamlining Your Research Laboratory with Python
+# Authors:   Mark F. Russo, Ph.D and William Neil 
+# Publisher: John Wiley & Sons, Inc.
+# License:   MIT (https://opensource.org/licenses/MIT)
+
+# Screening analysis of a whole campaign of plates at once.
+# Computes the same NPI, Z-factor and IQR hit calls as merge_measurements(),
+# Z_factor() and find_hits() in fig9.17-18.ipynb, but for every plate in a
+# single grouped pass instead of one plate at a time. The experiment and
+# measurement tables carry a 'plate' column; files without one are treated
+# as a single plate.
+import sys, time
+import numpy as np
+import pandas as pd
+
+# Read a table from a file name or use a DataFrame as given.
+# Adds plate 1 when there is no 'plate' column.
+def read_table(src):
+    df = pd.read_csv(src) if not isinstance(src, pd.DataFrame) else src
+    if 'plate' not in df.columns: df = df.assign(plate=1)
+    return df
+
+# Merge experiment and measurement tables on plate and destination well.
+# Repeated strings are stored as categories to keep large campaigns compact.
+def load_campaign(efile='experiment.csv', mfile='data_screen.csv'):
+    df   = read_table(efile)
+    data = read_table(mfile)
+    df   = pd.merge(df, data, on=['plate', 'dest'])
+    for col in ('src', 'ID', 'type', 'dest'):
+        if col in df.columns: df[col] = df[col].astype('category')
+    return df
+
+# Add a Normalized Percent Inhibition column computed from the mean
+# positive and negative control measurements of each plate
+def add_npi(df):
+    ctrl = df.groupby(['plate', 'type'], observed=True)['meas'].mean().unstack()
+    mpos = df['plate'].map(ctrl['P'])
+    mneg = df['plate'].map(ctrl['N'])
+    df['NPI'] = 100.0 * (1.0 - (mpos - df['meas'])/(mpos - mneg))
+    return df
+
+# Per-plate quality control table: control means and the Z-factor
+# between positive controls and test samples, as in Z_factor().
+# Also holds the hit threshold Q3 + 1.5*IQR of test sample NPI.
+def plate_qc(df):
+    stats = (df.groupby(['plate', 'type'], observed=True)['NPI']
+               .agg(['mean', 'std', 'count']).unstack())
+    meas  = df.groupby(['plate', 'type'], observed=True)['meas'].mean().unstack()
+    tests = df.loc[df['type'] == 'T'].groupby('plate')['NPI']
+    q1, q3 = tests.quantile(0.25), tests.quantile(0.75)
+
+    qc = pd.DataFrame({'mpos':      meas['P'],
+                       'mneg':      meas['N'],
+                       'ntests':    stats['count']['T'],
+                       'zprime':    1.0 - 3.0*(stats['std']['P'] + stats['std']['T']) /
+                                          (stats['mean']['P'] - stats['mean']['T']).abs(),
+                       'threshold': q3 + 1.5*(q3 - q1)})
+    return qc
+
+# Test samples with outlier NPI at or above their plate's threshold
+def find_hits(df, qc):
+    threshold = df['plate'].map(qc['threshold'])
+    return df.loc[(df['type'] == 'T') & (df['NPI'] >= threshold)]
+
+# Analyze a campaign. Returns (data with NPI, per-plate QC with hit counts, hits).
+def screen(efile='experiment.csv', mfile='data_screen.csv'):
+    df   = add_npi( load_campaign(efile, mfile) )
+    qc   = plate_qc(df)
+    hits = find_hits(df, qc)
+    qc['nhits'] = hits.groupby('plate').size().reindex(qc.index, fill_value=0)
+    return df, qc, hits
+
+# Build a synthetic campaign of nplates by adding noise to one plate
+def synthetic_campaign(efile, mfile, nplates, seed=None):
+    rng  = np.random.default_rng(seed)
+    exp  = pd.read_csv(efile)
+    data = pd.read_csv(mfile)
+    n    = len(data)
+    exp  = pd.concat([exp]*nplates, ignore_index=True)
+    exp['plate'] = np.repeat(np.arange(1, nplates+1), n)
+    data = pd.concat([data]*nplates, ignore_index=True)
+    data['plate'] = exp['plate']
+    data['meas'] += rng.normal(0, 0.01, len(data))
+    return exp, data
+
+if __name__ == '__main__':
+    efile = sys.argv[1] if len(sys.argv) > 1 else 'experiment.csv'
+    mfile = sys.argv[2] if len(sys.argv) > 2 else 'data_screen.csv'
+    df, qc, hits = screen(efile, mfile)
+    print(qc)
+    print(hits)
+
+    # Time a synthetic campaign built from the same plate
+    exp, data = synthetic_campaign(efile, mfile, 5000, seed=1)
+    start = time.perf_counter()
+    df, qc, hits = screen(exp, data)
+    print(f'{len(qc)} plates, {len(hits)} hits in {time.perf_counter()-start:.2f} s')